@@ -134,7 +134,7 @@ async def rag_case_analysis(
     Requires licensed professional access
     """
     try:
-        # Load the specific case
+        # Load the specific case; it is shared with the loader cache, so only read it
         case = DataLoader.get_case_by_id(case_id)
         if not case:
             raise HTTPException(status_code=404, detail=f"Case {case_id} not found")
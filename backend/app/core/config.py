@@ -41,6 +41,22 @@ class Settings(BaseSettings):
     OPENAI_MAX_TOKENS: int = 1500
     OPENAI_TEMPERATURE: float = 0.3
     
+    # Speech Recognition Configuration
+    SPEECH_RECOGNITION_BACKEND: str = "google"  # "google" or "whisper" (local, offline)
+    WHISPER_MODEL: str = "tiny"
+    
+    # Audio Feature Extraction
+    AUDIO_ANALYSIS_DEVICE: str = "cpu"  # "cpu" or "cuda" (needs torch and torchaudio)
+    AUDIO_FEATURE_CACHE_DIR: Optional[str] = None  # Disk cache shared across processes; off when unset
+    
+    # Sentiment Analysis Configuration
+    SENTIMENT_BACKEND: str = "openai"  # "openai" or "onnx" (local, needs onnxruntime and transformers)
+    SENTIMENT_ONNX_MODEL: str = "models/distilbert-sst2-int8.onnx"
+    SENTIMENT_TOKENIZER: str = "distilbert-base-uncased-finetuned-sst-2-english"
+    # Cosine similarity for reusing a cached label; negated pairs such as
+    # "I feel hopeful" / "I don't feel hopeful" often score above 0.9
+    SENTIMENT_CACHE_SIMILARITY: float = 0.97
+    
     # Vector Database Configuration
     VECTOR_DB_TYPE: str = "chromadb"  # "chromadb" or "faiss"
     CHROMA_PERSIST_DIRECTORY: str = "data/chroma_db"
@@ -243,6 +243,14 @@ async def lifespan(app: FastAPI):
             logger.error(f"Error creating demo users: {e}")
             await db.rollback()
     
+    # Pay audio kernel JIT compilation here rather than on the first voice request
+    await asyncio.to_thread(warm_up_audio_kernels)
+    
+    # The semantic sentiment cache only fronts OpenAI, so load its embedding
+    # model up front when that path is live
+    if audio_analysis_service.openai_client:
+        await asyncio.to_thread(load_embedding_model)
+    
     yield
     
     # Shutdown
@@ -302,6 +310,8 @@ from pydantic import BaseModel, validator, Field
 import re
 from typing import Dict, Any, Optional, List
 from .services.audio_analysis import audio_analysis_service
+from .services.audio_kernels import warm_up as warm_up_audio_kernels
+from .services.sentiment_cache import load_embedding_model
 
 def validate_password_strength(password: str) -> str:
     """Validate password meets security requirements"""
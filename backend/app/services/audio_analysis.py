@@ -3,69 +3,215 @@ Audio analysis service for voice tone and emotion detection
 """
 
 import io
+import asyncio
 import base64
+import hashlib
 import json
 import logging
-from typing import Dict, Any, Optional, Tuple, List, Union
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple, List, Union
+import joblib
 import speech_recognition as sr
 import numpy as np
 from scipy.io import wavfile
 from scipy.signal import spectrogram
 import librosa
+import msgspec
 import openai
-from pydantic import BaseModel, Field, validator
+import soundfile as sf
 from fastapi import HTTPException
 from ..core.config import settings
+from .audio_gpu import GPUFeatureExtractor, cuda_available
+from .audio_kernels import find_pauses, frame_rms, mean_variance, voiced_pitch_stats
+from .local_sentiment import load_sentiment_classifier
+from .sentiment_cache import SentimentCache
 
 logger = logging.getLogger(__name__)
 
-class AudioFeatures(BaseModel):
+# Frame parameters for batched analysis, matching librosa's feature defaults
+STFT_N_FFT = 2048
+STFT_HOP_LENGTH = 512
+
+# Tone/emotion decision table. Each feature is bucketed against its rule
+# thresholds with np.searchsorted(side="right"); nextafter turns a strict
+# "> t" threshold into ">= the next float", so boundaries match the rules
+PITCH_BINS = np.array([150.0, np.nextafter(200.0, np.inf)])
+PITCH_VARIANCE_BINS = np.array([np.nextafter(1000.0, np.inf), np.nextafter(1500.0, np.inf)])
+ENERGY_BINS = np.array([0.01, 0.02, np.nextafter(0.05, np.inf)])
+ENERGY_VARIANCE_BINS = np.array([np.nextafter(0.01, np.inf)])
+PAUSE_FREQUENCY_BINS = np.array([np.nextafter(10.0, np.inf)])
+
+def _build_tone_emotion_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """Tabulate tone and emotion for every combination of feature buckets"""
+    shape = (
+        len(PITCH_BINS) + 1,
+        len(PITCH_VARIANCE_BINS) + 1,
+        len(ENERGY_BINS) + 1,
+        len(ENERGY_VARIANCE_BINS) + 1,
+        len(PAUSE_FREQUENCY_BINS) + 1
+    )
+    tones = np.full(shape, "neutral", dtype=object)
+    emotions = np.full(shape, "neutral", dtype=object)
+    
+    for index in np.ndindex(shape):
+        pitch, pitch_variance, energy, energy_variance, pauses = index
+        
+        # Tone: high pitch is anxious or calm by variance, low pitch is
+        # depressed or calm by energy, frequent pauses with unsteady energy
+        # override both as agitated
+        if energy_variance and pauses:
+            tones[index] = "agitated"
+        elif pitch == 2:
+            tones[index] = "anxious" if pitch_variance else "calm"
+        elif pitch == 0:
+            tones[index] = "depressed" if energy < 2 else "calm"
+        
+        # Emotion: energy extremes first, then high pitch variance
+        if energy == 3:
+            emotions[index] = "excited"
+        elif energy == 0:
+            emotions[index] = "sad"
+        elif pitch_variance == 2:
+            emotions[index] = "anxious"
+    
+    return tones, emotions
+
+TONE_TABLE, EMOTION_TABLE = _build_tone_emotion_tables()
+
+def _features_by_digest(digest: str, sample_rate: Optional[int], compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compute features for a recording identified by its content digest
+    
+    Wrapped with joblib.Memory, which keys the disk cache on digest and
+    sample_rate only; compute runs on a miss.
+    """
+    return compute()
+
+class AudioFeatures(msgspec.Struct):
     """Audio features extracted from speech signal"""
-    mean_pitch: float = Field(default=0.0, description="Mean fundamental frequency")
-    pitch_variance: float = Field(default=0.0, description="Pitch variance")
-    pitch_range: float = Field(default=0.0, description="Pitch range (max - min)")
-    mean_energy: float = Field(default=0.0, description="Mean RMS energy")
-    energy_variance: float = Field(default=0.0, description="Energy variance")
-    spectral_centroid: float = Field(default=0.0, description="Spectral centroid")
-    zero_crossing_rate: float = Field(default=0.0, description="Zero crossing rate")
-    tempo: float = Field(default=0.0, description="Estimated tempo")
-    duration: float = Field(default=0.0, description="Audio duration in seconds")
-    pause_count: int = Field(default=0, description="Number of detected pauses")
-    pause_frequency: float = Field(default=0.0, description="Pauses per minute")
+    mean_pitch: float = 0.0  # Mean fundamental frequency
+    pitch_variance: float = 0.0  # Pitch variance
+    pitch_range: float = 0.0  # Pitch range (max - min)
+    mean_energy: float = 0.0  # Mean RMS energy
+    energy_variance: float = 0.0  # Energy variance
+    spectral_centroid: float = 0.0  # Spectral centroid
+    zero_crossing_rate: float = 0.0  # Zero crossing rate
+    tempo: float = 0.0  # Estimated tempo
+    duration: float = 0.0  # Audio duration in seconds
+    pause_count: int = 0  # Number of detected pauses
+    pause_frequency: float = 0.0  # Pauses per minute
+
+ALLOWED_SENTIMENTS = frozenset({'positive', 'negative', 'neutral'})
+ALLOWED_TONES = frozenset({'calm', 'anxious', 'depressed', 'agitated', 'neutral'})
 
-class VoiceAnalysis(BaseModel):
+class VoiceAnalysis(msgspec.Struct):
     """Complete voice analysis results"""
-    transcription: str = Field(..., description="Transcribed text from speech")
-    sentiment: str = Field(default="neutral", description="Sentiment classification")
-    emotion: str = Field(default="neutral", description="Detected emotion")
-    tone: str = Field(default="neutral", description="Voice tone classification")
-    speech_rate: float = Field(default=0.0, description="Words per minute")
-    pause_frequency: float = Field(default=0.0, description="Pauses per minute")
-    confidence: float = Field(default=0.0, ge=0.0, le=1.0, description="Analysis confidence score")
+    transcription: str  # Transcribed text from speech
+    sentiment: str = "neutral"  # Sentiment classification
+    emotion: str = "neutral"  # Detected emotion
+    tone: str = "neutral"  # Voice tone classification
+    speech_rate: float = 0.0  # Words per minute
+    pause_frequency: float = 0.0  # Pauses per minute
+    confidence: float = 0.0  # Analysis confidence score, 0 to 1
     
-    @validator('sentiment')
-    def validate_sentiment(cls, v: str) -> str:
-        allowed_sentiments = ['positive', 'negative', 'neutral']
-        if v not in allowed_sentiments:
-            return 'neutral'
-        return v
-    
-    @validator('tone')
-    def validate_tone(cls, v: str) -> str:
-        allowed_tones = ['calm', 'anxious', 'depressed', 'agitated', 'neutral']
-        if v not in allowed_tones:
-            return 'neutral'
-        return v
+    def __post_init__(self) -> None:
+        # Unknown labels fall back to neutral; out-of-range confidence is an error
+        if self.sentiment not in ALLOWED_SENTIMENTS:
+            self.sentiment = 'neutral'
+        if self.tone not in ALLOWED_TONES:
+            self.tone = 'neutral'
+        if not 0.0 <= self.confidence <= 1.0:
+            raise ValueError(f"confidence must be between 0 and 1, got {self.confidence}")
 
 class AudioAnalysisService:
     """Service for analyzing audio files for transcription and emotional content"""
     
-    def __init__(self) -> None:
+    # Number of decoded recordings kept for repeated analyses of the same clip
+    DECODED_AUDIO_CACHE_SIZE = 32
+    
+    # Recordings above this rate are resampled before feature extraction;
+    # pitch, energy and pauses all sit well inside its 4 kHz band
+    FEATURE_SAMPLE_RATE = 8000
+    
+    def __init__(
+        self,
+        transcription_backend: Optional[str] = None,
+        device: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        sentiment_backend: Optional[str] = None
+    ) -> None:
         self.recognizer: sr.Recognizer = sr.Recognizer()
+        self.transcription_backend: str = transcription_backend or settings.SPEECH_RECOGNITION_BACKEND
+        self.sentiment_backend: str = sentiment_backend or settings.SENTIMENT_BACKEND
+        self.device: str = device or settings.AUDIO_ANALYSIS_DEVICE
+        self._gpu_features: Optional[GPUFeatureExtractor] = None
         self.openai_client: Optional[openai.OpenAI] = (
             openai.OpenAI(api_key=settings.OPENAI_API_KEY) 
             if settings.OPENAI_API_KEY else None
         )
+        # {blake2b digest of audio bytes: (samples, sample_rate)}, oldest first
+        self._decoded_audio: "OrderedDict[bytes, Tuple[np.ndarray, int]]" = OrderedDict()
+        # Feature extraction runs on executor threads, which share the cache
+        self._decoded_audio_lock = threading.Lock()
+        
+        # Features on disk by content hash, shared across processes and restarts
+        cache_dir = cache_dir or settings.AUDIO_FEATURE_CACHE_DIR
+        self._feature_cache: Optional[Callable[..., Dict[str, Any]]] = (
+            joblib.Memory(cache_dir, verbose=0).cache(_features_by_digest, ignore=["compute"])
+            if cache_dir else None
+        )
+        
+        # Labels for recent transcriptions, reused for repeated or near-identical speech
+        self.sentiment_cache = SentimentCache()
+    
+    def _load_audio(self, audio_bytes: bytes) -> Tuple[np.ndarray, int]:
+        """Decode audio at the feature sample rate, reusing the result for identical bytes"""
+        key = hashlib.blake2b(audio_bytes, digest_size=16).digest()
+        
+        with self._decoded_audio_lock:
+            cached = self._decoded_audio.get(key)
+            if cached is not None:
+                self._decoded_audio.move_to_end(key)
+                return cached
+        
+        try:
+            # WAV/FLAC/OGG decode straight from memory through libsndfile
+            audio_array, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype="float32", always_2d=False)
+            if audio_array.ndim > 1:
+                audio_array = audio_array.mean(axis=1)
+        except sf.LibsndfileError:
+            # Formats libsndfile cannot read, such as MP3 on older builds
+            audio_array, sample_rate = librosa.load(io.BytesIO(audio_bytes), sr=None)
+        if self.FEATURE_SAMPLE_RATE and sample_rate > self.FEATURE_SAMPLE_RATE:
+            # Polyphase filtering is much cheaper than librosa's default soxr_hq
+            audio_array = librosa.resample(
+                audio_array, orig_sr=sample_rate, target_sr=self.FEATURE_SAMPLE_RATE, res_type="polyphase"
+            )
+            sample_rate = self.FEATURE_SAMPLE_RATE
+        
+        # Cached samples are shared between analyses, so keep them read-only;
+        # the compiled kernels expect float32, which both decoders return
+        audio_array = np.asarray(audio_array, dtype=np.float32)
+        audio_array.flags.writeable = False
+        
+        with self._decoded_audio_lock:
+            self._decoded_audio[key] = (audio_array, sample_rate)
+            if len(self._decoded_audio) > self.DECODED_AUDIO_CACHE_SIZE:
+                self._decoded_audio.popitem(last=False)
+        
+        return audio_array, sample_rate
+    
+    def _gpu_extractor(self) -> Optional[GPUFeatureExtractor]:
+        """Return the CUDA feature extractor, creating it on first use, or None on CPU"""
+        if self._gpu_features is None and self.device.startswith("cuda"):
+            if not cuda_available():
+                logger.warning("CUDA requested for audio analysis but unavailable, using librosa")
+                self.device = "cpu"
+                return None
+            self._gpu_features = GPUFeatureExtractor(self.device, STFT_N_FFT, STFT_HOP_LENGTH)
+        
+        return self._gpu_features
         
     async def transcribe_audio(self, audio_data: str) -> str:
         """Transcribe audio to text using speech recognition"""
@@ -73,16 +219,9 @@ class AudioAnalysisService:
             # Decode base64 audio data
             audio_bytes = base64.b64decode(audio_data)
             
-            # Create audio file object
-            audio_file = io.BytesIO(audio_bytes)
-            
-            # Use speech recognition
-            with sr.AudioFile(audio_file) as source:
-                audio = self.recognizer.record(source)
-                
-            # Perform recognition
-            text = self.recognizer.recognize_google(audio)
-            return text
+            # Recognition blocks on the network or the CPU, so keep it off the event loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._transcribe_bytes, audio_bytes)
             
         except sr.UnknownValueError:
             logger.warning("Could not understand audio")
@@ -94,126 +233,197 @@ class AudioAnalysisService:
             logger.error(f"Transcription error: {e}")
             raise HTTPException(status_code=500, detail="Audio transcription failed")
     
+    def _transcribe_bytes(self, audio_bytes: bytes) -> str:
+        """Read a recording and run speech recognition on it"""
+        return self._recognize(self._audio_data(audio_bytes))
+    
+    def _audio_data(self, audio_bytes: bytes) -> sr.AudioData:
+        """Wrap a recording's 16-bit PCM samples as speech_recognition AudioData"""
+        try:
+            # One libsndfile read instead of AudioFile's chunked record loop
+            samples, sample_rate = sf.read(io.BytesIO(audio_bytes), dtype="int16", always_2d=True)
+            if samples.shape[1] > 1:
+                samples = samples.mean(axis=1).astype(np.int16)
+            return sr.AudioData(np.ascontiguousarray(samples).tobytes(), sample_rate, 2)
+        except sf.LibsndfileError:
+            # Formats libsndfile cannot read go through speech_recognition's own parser
+            with sr.AudioFile(io.BytesIO(audio_bytes)) as source:
+                return self.recognizer.record(source)
+    
+    def _recognize(self, audio: sr.AudioData) -> str:
+        """Recognize speech with the configured backend, falling back to Google"""
+        if self.transcription_backend == "whisper":
+            try:
+                # Runs on this machine, so there is no network round trip
+                return self.recognizer.recognize_whisper(
+                    audio, model=settings.WHISPER_MODEL, language="english"
+                ).strip()
+            except Exception as e:
+                logger.warning(f"Local Whisper transcription unavailable, using Google: {e}")
+        
+        return self.recognizer.recognize_google(audio)
+    
     def analyze_audio_features(self, audio_data: str) -> AudioFeatures:
         """Analyze audio features for tone and emotion detection"""
         try:
             # Decode base64 audio data
             audio_bytes = base64.b64decode(audio_data)
             
-            # Load audio with librosa
-            audio_array, sample_rate = librosa.load(io.BytesIO(audio_bytes), sr=None)
+            if self._feature_cache is None:
+                return self._extract_features(audio_bytes)
             
+            digest = hashlib.blake2b(audio_bytes, digest_size=16).hexdigest()
+            return AudioFeatures(**self._feature_cache(
+                digest, self.FEATURE_SAMPLE_RATE, lambda: msgspec.structs.asdict(self._extract_features(audio_bytes))
+            ))
+            
+        except Exception as e:
+            logger.error(f"Audio feature analysis error: {e}")
+            return AudioFeatures()
+    
+    def _extract_features(self, audio_bytes: bytes) -> AudioFeatures:
+        """Extract features from decoded audio bytes"""
+        # Load audio with librosa
+        audio_array, sample_rate = self._load_audio(audio_bytes)
+        
+        gpu_extractor = self._gpu_extractor()
+        if gpu_extractor is not None:
+            # STFT, energy, centroid and zero crossings on the GPU; pitch
+            # tracking reuses the spectrum it returns
+            spectrum, rms, spectral_centroid, zcr = gpu_extractor.extract(audio_array, sample_rate)
+            pitches, magnitudes = librosa.piptrack(S=spectrum, sr=sample_rate)
+        else:
             # Extract features
             # Fundamental frequency (pitch)
             pitches, magnitudes = librosa.piptrack(y=audio_array, sr=sample_rate)
-            pitch_values: List[float] = []
-            for t in range(pitches.shape[1]):
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                if pitch > 0:
-                    pitch_values.append(float(pitch))
-            
-            mean_pitch = float(np.mean(pitch_values)) if pitch_values else 0.0
-            pitch_variance = float(np.var(pitch_values)) if pitch_values else 0.0
-            pitch_range = float(max(pitch_values) - min(pitch_values)) if pitch_values else 0.0
             
-            # Energy/intensity
-            rms = librosa.feature.rms(y=audio_array)[0]
-            mean_energy = float(np.mean(rms))
-            energy_variance = float(np.var(rms))
+            # Energy/intensity, without librosa's padded copy and squared frame matrix
+            rms = frame_rms(audio_array, STFT_N_FFT, STFT_HOP_LENGTH)
             
             # Spectral features
             spectral_centroid = librosa.feature.spectral_centroid(y=audio_array, sr=sample_rate)[0]
-            spectral_centroid_mean = float(np.mean(spectral_centroid))
             
             # Zero crossing rate (voice quality indicator)
             zcr = librosa.feature.zero_crossing_rate(audio_array)[0]
-            zero_crossing_rate = float(np.mean(zcr))
+        
+        # Tempo and rhythm
+        tempo, beats = librosa.beat.beat_track(y=audio_array, sr=sample_rate)
+        
+        # Speech rate estimation
+        duration = float(len(audio_array) / sample_rate)
+        
+        return self._summarize_features(
+            pitches, magnitudes, rms, spectral_centroid, zcr, float(np.ravel(tempo)[0]), duration
+        )
+    
+    def analyze_batch(self, audio_samples: List[str]) -> List[AudioFeatures]:
+        """Analyze audio features for several recordings with one shared STFT"""
+        try:
+            clips = [self._load_audio(base64.b64decode(sample)) for sample in audio_samples]
+            if not clips:
+                return []
             
-            # Tempo and rhythm
-            tempo, beats = librosa.beat.beat_track(y=audio_array, sr=sample_rate)
-            tempo_value = float(tempo)
+            # Clips can only be stacked when they share a sample rate
+            sample_rates = {sample_rate for _, sample_rate in clips}
+            if len(sample_rates) > 1:
+                return [self.analyze_audio_features(sample) for sample in audio_samples]
+            sample_rate = sample_rates.pop()
             
-            # Speech rate estimation
-            duration = float(len(audio_array) / sample_rate)
+            # Zero-pad every clip to the longest one: shape (clips, samples)
+            batch = np.zeros((len(clips), max(len(audio_array) for audio_array, _ in clips)), dtype=np.float32)
+            for row, (audio_array, _) in zip(batch, clips):
+                row[:len(audio_array)] = audio_array
             
-            # Pause detection (silence detection)
-            silence_threshold = 0.01
-            silent_frames = rms < silence_threshold
-            pause_segments = self._find_pause_segments(silent_frames)
-            pause_count = len(pause_segments)
-            pause_frequency = float(pause_count / (duration / 60)) if duration > 0 else 0.0
+            # One STFT for the whole batch, shared by pitch and centroid
+            spectra = np.abs(librosa.stft(batch, n_fft=STFT_N_FFT, hop_length=STFT_HOP_LENGTH))
+            pitches, magnitudes = librosa.piptrack(S=spectra, sr=sample_rate)
+            spectral_centroid = librosa.feature.spectral_centroid(S=spectra, sr=sample_rate)[:, 0]
+            zcr = librosa.feature.zero_crossing_rate(batch, frame_length=STFT_N_FFT, hop_length=STFT_HOP_LENGTH)[:, 0]
             
-            return AudioFeatures(
-                mean_pitch=mean_pitch,
-                pitch_variance=pitch_variance,
-                pitch_range=pitch_range,
-                mean_energy=mean_energy,
-                energy_variance=energy_variance,
-                spectral_centroid=spectral_centroid_mean,
-                zero_crossing_rate=zero_crossing_rate,
-                tempo=tempo_value,
-                duration=duration,
-                pause_count=pause_count,
-                pause_frequency=pause_frequency
-            )
+            results: List[AudioFeatures] = []
+            for i, (audio_array, _) in enumerate(clips):
+                # Drop the frames that only cover this clip's padding
+                frames = 1 + len(audio_array) // STFT_HOP_LENGTH
+                tempo, beats = librosa.beat.beat_track(y=audio_array, sr=sample_rate)
+                results.append(self._summarize_features(
+                    pitches[i, :, :frames],
+                    magnitudes[i, :, :frames],
+                    frame_rms(audio_array, STFT_N_FFT, STFT_HOP_LENGTH),
+                    spectral_centroid[i, :frames],
+                    zcr[i, :frames],
+                    float(np.ravel(tempo)[0]),
+                    float(len(audio_array) / sample_rate)
+                ))
+            
+            return results
             
         except Exception as e:
-            logger.error(f"Audio feature analysis error: {e}")
-            return AudioFeatures()
+            logger.error(f"Batch audio feature analysis error: {e}")
+            return [AudioFeatures() for _ in audio_samples]
     
-    def _find_pause_segments(self, silent_frames: np.ndarray, min_pause_length: int = 5) -> List[Tuple[int, int]]:
-        """Find pause segments in audio"""
-        pauses: List[Tuple[int, int]] = []
-        in_pause = False
-        pause_start = 0
+    def _summarize_features(
+        self,
+        pitches: np.ndarray,
+        magnitudes: np.ndarray,
+        rms: np.ndarray,
+        spectral_centroid: np.ndarray,
+        zcr: np.ndarray,
+        tempo: float,
+        duration: float
+    ) -> AudioFeatures:
+        """Reduce one clip's frame-level measurements to AudioFeatures"""
+        # The kernels are warmed up for float32, which librosa already returns
+        pitches, magnitudes, rms = (np.asarray(a, dtype=np.float32) for a in (pitches, magnitudes, rms))
+        
+        # Pitch of the strongest bin in each frame, skipping unvoiced frames
+        mean_pitch, pitch_variance, pitch_range = voiced_pitch_stats(pitches, magnitudes)
+        
+        # Energy moments in one pass over the frames
+        mean_energy, energy_variance = mean_variance(rms)
         
-        for i, is_silent in enumerate(silent_frames):
-            if is_silent and not in_pause:
-                in_pause = True
-                pause_start = i
-            elif not is_silent and in_pause:
-                in_pause = False
-                if i - pause_start >= min_pause_length:
-                    pauses.append((pause_start, i))
+        # Pause detection (silence detection)
+        silence_threshold = 0.01
+        silent_frames = rms < silence_threshold
+        pause_segments = self._find_pause_segments(silent_frames)
+        pause_count = len(pause_segments)
+        pause_frequency = float(pause_count / (duration / 60)) if duration > 0 else 0.0
         
-        return pauses
+        return AudioFeatures(
+            mean_pitch=mean_pitch,
+            pitch_variance=pitch_variance,
+            pitch_range=pitch_range,
+            mean_energy=mean_energy,
+            energy_variance=energy_variance,
+            spectral_centroid=float(np.mean(spectral_centroid)),
+            zero_crossing_rate=float(np.mean(zcr)),
+            tempo=tempo,
+            duration=duration,
+            pause_count=pause_count,
+            pause_frequency=pause_frequency
+        )
+    
+    def _find_pause_segments(self, silent_frames: np.ndarray, min_pause_length: int = 5) -> List[Tuple[int, int]]:
+        """Find pause segments in audio"""
+        pauses = find_pauses(np.asarray(silent_frames, dtype=np.bool_), min_pause_length)
+        return [(start, end) for start, end in pauses.tolist()]
     
     def classify_tone_emotion(self, features: AudioFeatures, transcription: str) -> Tuple[str, str, str]:
         """Classify tone and emotion based on audio features and transcription"""
         try:
-            # Rule-based classification using audio features
-            tone = "neutral"
-            emotion = "neutral"
+            # Rule-based classification using audio features, as a table lookup
+            index = (
+                np.searchsorted(PITCH_BINS, features.mean_pitch, side="right"),
+                np.searchsorted(PITCH_VARIANCE_BINS, features.pitch_variance, side="right"),
+                np.searchsorted(ENERGY_BINS, features.mean_energy, side="right"),
+                np.searchsorted(ENERGY_VARIANCE_BINS, features.energy_variance, side="right"),
+                np.searchsorted(PAUSE_FREQUENCY_BINS, features.pause_frequency, side="right")
+            )
+            tone = TONE_TABLE[index]
+            emotion = EMOTION_TABLE[index]
             sentiment = "neutral"
             
-            # Tone classification based on pitch and energy
-            if features.mean_pitch > 200:  # High pitch
-                if features.pitch_variance > 1000:  # High variance
-                    tone = "anxious"
-                else:
-                    tone = "calm"
-            elif features.mean_pitch < 150:  # Low pitch
-                if features.mean_energy < 0.02:  # Low energy
-                    tone = "depressed"
-                else:
-                    tone = "calm"
-            
-            # Agitated detection
-            if (features.energy_variance > 0.01 and 
-                features.pause_frequency > 10):
-                tone = "agitated"
-            
-            # Emotion classification
-            if features.mean_energy > 0.05:  # High energy
-                emotion = "excited"
-            elif features.mean_energy < 0.01:  # Low energy
-                emotion = "sad"
-            elif features.pitch_variance > 1500:  # High pitch variance
-                emotion = "anxious"
-            
-            # Use OpenAI for sentiment analysis if available
-            if self.openai_client and transcription:
+            # Use the local model or OpenAI for sentiment analysis if available
+            if transcription and (self.openai_client or self.sentiment_backend == "onnx"):
                 sentiment = self._analyze_sentiment_with_ai(transcription)
             
             return tone, emotion, sentiment
@@ -223,7 +433,20 @@ class AudioAnalysisService:
             return "neutral", "neutral", "neutral"
     
     def _analyze_sentiment_with_ai(self, transcription: str) -> str:
-        """Analyze sentiment using OpenAI"""
+        """Analyze sentiment with the local model when configured, otherwise OpenAI"""
+        # The local model costs about as much as a semantic cache lookup, so
+        # its answers bypass the cache
+        sentiment = self._analyze_sentiment_locally(transcription)
+        if sentiment is not None:
+            return sentiment
+        
+        if self.openai_client is None:
+            return "neutral"
+        
+        cached = self.sentiment_cache.get(transcription)
+        if cached is not None:
+            return cached
+        
         try:
             response = self.openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
@@ -239,11 +462,28 @@ class AudioAnalysisService:
             if sentiment not in ['positive', 'negative', 'neutral']:
                 sentiment = 'neutral'
             
-            return sentiment
-            
         except Exception as e:
             logger.error(f"AI sentiment analysis error: {e}")
             return "neutral"
+        
+        # Only answers from the API are cached; failures are retried next time
+        self.sentiment_cache.put(transcription, sentiment)
+        return sentiment
+    
+    def _analyze_sentiment_locally(self, transcription: str) -> Optional[str]:
+        """Classify sentiment with the local ONNX model, or None when it is not in use"""
+        if self.sentiment_backend != "onnx":
+            return None
+        
+        classifier = load_sentiment_classifier()
+        if classifier is None:
+            return None
+        
+        try:
+            return classifier.classify(transcription)
+        except Exception as e:
+            logger.warning(f"Local sentiment analysis failed, falling back to OpenAI: {e}")
+            return None
     
     def calculate_speech_rate(self, transcription: str, duration: float) -> float:
         """Calculate speech rate in words per minute"""
@@ -257,19 +497,23 @@ class AudioAnalysisService:
     async def analyze_voice_comprehensive(self, audio_data: str) -> VoiceAnalysis:
         """Comprehensive voice analysis including transcription, tone, and emotion"""
         try:
-            # Transcribe audio
-            transcription = await self.transcribe_audio(audio_data)
+            loop = asyncio.get_running_loop()
             
-            # Analyze audio features
-            features = self.analyze_audio_features(audio_data)
+            # Transcription waits on the recognizer while feature extraction
+            # is CPU work, so run both at once
+            transcription, features = await asyncio.gather(
+                self.transcribe_audio(audio_data),
+                loop.run_in_executor(None, self.analyze_audio_features, audio_data)
+            )
             
-            # Classify tone and emotion
-            tone, emotion, sentiment = self.classify_tone_emotion(features, transcription)
+            # Classify tone and emotion; sentiment may call OpenAI
+            tone, emotion, sentiment = await loop.run_in_executor(
+                None, self.classify_tone_emotion, features, transcription
+            )
             
             # Calculate speech metrics
-            duration = features.get('duration', 0)
-            speech_rate = self.calculate_speech_rate(transcription, duration)
-            pause_frequency = features.get('pause_frequency', 0)
+            speech_rate = self.calculate_speech_rate(transcription, features.duration)
+            pause_frequency = features.pause_frequency
             
             # Calculate confidence based on feature reliability
             confidence = self._calculate_confidence(features, transcription)
@@ -290,17 +534,14 @@ class AudioAnalysisService:
     
     def _calculate_confidence(self, features: AudioFeatures, transcription: str) -> float:
         """Calculate confidence score for the analysis"""
-        confidence = 0.5  # Base confidence
-        
-        # Increase confidence based on audio quality indicators
-        if features.mean_energy > 0.01:
-            confidence += 0.2
-        
-        if features.duration > 3:  # At least 3 seconds
-            confidence += 0.2
-        
-        if len(transcription.split()) > 5:  # At least 5 words
-            confidence += 0.1
+        # Base confidence plus a fixed bonus per audio quality indicator met;
+        # the word check splits at most 6 words however long the transcription
+        confidence = (
+            0.5
+            + 0.2 * (features.mean_energy > 0.01)
+            + 0.2 * (features.duration > 3)  # At least 3 seconds
+            + 0.1 * (len(transcription.split(maxsplit=5)) > 5)  # At least 5 words
+        )
         
         return min(confidence, 1.0)
 
@@ -0,0 +1,75 @@
+"""
+Local sentiment classification with a quantized ONNX DistilBERT model
+"""
+
+import logging
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# SST-2 output order of distilbert-base-uncased-finetuned-sst-2-english
+SST2_LABELS = ("negative", "positive")
+
+@lru_cache(maxsize=1)
+def load_sentiment_classifier() -> Optional["LocalSentimentClassifier"]:
+    """Load the ONNX sentiment model once per process, or None if unavailable"""
+    try:
+        import onnxruntime
+        from transformers import AutoTokenizer
+        
+        session = onnxruntime.InferenceSession(
+            settings.SENTIMENT_ONNX_MODEL, providers=["CPUExecutionProvider"]
+        )
+        tokenizer = AutoTokenizer.from_pretrained(settings.SENTIMENT_TOKENIZER)
+        return LocalSentimentClassifier(session, tokenizer)
+    except Exception as e:
+        logger.warning(f"Could not load local sentiment model: {e}. Using OpenAI for sentiment.")
+        return None
+
+class LocalSentimentClassifier:
+    """
+    Three-way sentiment from a two-class (negative/positive) model
+    
+    Predictions whose winning probability falls below the neutral threshold
+    are reported as neutral.
+    """
+    
+    def __init__(
+        self,
+        session: Any,
+        tokenizer: Any,
+        neutral_threshold: float = 0.6,
+        labels: Sequence[str] = SST2_LABELS
+    ):
+        """
+        Args:
+            session: onnxruntime InferenceSession producing logits
+            tokenizer: Hugging Face tokenizer matching the model
+            neutral_threshold: Minimum class probability for a non-neutral label
+            labels: Sentiment for each logit, in model output order
+        """
+        self.session = session
+        self.tokenizer = tokenizer
+        self.neutral_threshold = neutral_threshold
+        self.labels = tuple(labels)
+        self._input_names = [model_input.name for model_input in session.get_inputs()]
+    
+    def classify(self, text: str) -> str:
+        """Return 'positive', 'negative' or 'neutral' for text"""
+        encoded = self.tokenizer(text, truncation=True, max_length=512, return_tensors="np")
+        feed = {name: np.asarray(encoded[name], dtype=np.int64) for name in self._input_names}
+        logits = np.asarray(self.session.run(None, feed)[0][0], dtype=np.float64)
+        
+        # Softmax, shifted by the maximum for stability
+        probabilities = np.exp(logits - logits.max())
+        probabilities /= probabilities.sum()
+        
+        best = int(probabilities.argmax())
+        if probabilities[best] < self.neutral_threshold:
+            return "neutral"
+        return self.labels[best]
@@ -0,0 +1,145 @@
+"""
+Two-tier cache for AI sentiment labels: exact text, then semantic similarity
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def load_embedding_model() -> Optional[Any]:
+    """Load the sentence embedding model once per process, or None if unavailable"""
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(settings.EMBEDDING_MODEL)
+    except Exception as e:
+        logger.warning(f"Could not load embedding model: {e}. Semantic sentiment cache disabled.")
+        return None
+
+def _normalize(text: str) -> str:
+    """Collapse case and whitespace so trivially different texts share a key"""
+    return " ".join(text.lower().split())
+
+class SentimentCache:
+    """
+    Cache sentiment labels by exact transcription and by embedding similarity
+    
+    Exact matches are kept in an LRU dict. Semantic matches compare the
+    L2-normalized embedding of a new transcription against those of
+    previously labelled ones; the closest one at or above the similarity
+    threshold supplies the label. Both tiers hold at most max_entries.
+    
+    Safe to share between threads; embeddings are computed outside the lock.
+    """
+    
+    def __init__(
+        self,
+        embed: Optional[Callable[[str], np.ndarray]] = None,
+        max_entries: int = 1024,
+        similarity_threshold: Optional[float] = None
+    ):
+        """
+        Args:
+            embed: Maps text to an embedding vector; defaults to the shared
+                sentence-transformers model, loaded on first use
+            max_entries: Labels kept per tier before the oldest are evicted
+            similarity_threshold: Minimum cosine similarity for a semantic hit;
+                defaults to settings.SENTIMENT_CACHE_SIMILARITY
+        """
+        self._embed = embed
+        self.max_entries = max_entries
+        self.similarity_threshold = (
+            settings.SENTIMENT_CACHE_SIMILARITY if similarity_threshold is None else similarity_threshold
+        )
+        
+        self._exact: "OrderedDict[str, str]" = OrderedDict()
+        
+        # Ring buffer of unit embeddings and their labels, filled in order
+        self._vectors: Optional[np.ndarray] = None
+        self._labels: list = []
+        self._next_slot = 0
+        
+        # Guards both tiers; classification runs on executor threads
+        self._lock = threading.Lock()
+    
+    def _embedding(self, text: str) -> Optional[np.ndarray]:
+        """Return the unit-length embedding of text, or None without a model"""
+        if self._embed is None:
+            model = load_embedding_model()
+            if model is None:
+                return None
+            self._embed = model.encode
+        
+        try:
+            vector = np.asarray(self._embed(text), dtype=np.float32).ravel()
+        except Exception as e:
+            logger.warning(f"Sentiment cache embedding failed: {e}")
+            return None
+        
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+    
+    def get(self, text: str) -> Optional[str]:
+        """Return the cached label for text or a near-identical text, if any"""
+        key = _normalize(text)
+        with self._lock:
+            label = self._exact.get(key)
+            if label is not None:
+                self._exact.move_to_end(key)
+                return label
+            
+            if not self._labels:
+                return None
+        
+        vector = self._embedding(key)
+        if vector is None:
+            return None
+        
+        with self._lock:
+            # Cosine similarity against every stored embedding in one product
+            similarities = self._vectors[:len(self._labels)] @ vector
+            best = int(similarities.argmax())
+            if similarities[best] < self.similarity_threshold:
+                return None
+            
+            label = self._labels[best]
+            self._remember_exact(key, label)
+            return label
+    
+    def put(self, text: str, label: str) -> None:
+        """Cache the label for text in both tiers"""
+        key = _normalize(text)
+        with self._lock:
+            self._remember_exact(key, label)
+        
+        vector = self._embedding(key)
+        if vector is None:
+            return
+        
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.empty((self.max_entries, vector.size), dtype=np.float32)
+            
+            # Overwrite the oldest slot once the buffer is full
+            slot = self._next_slot
+            self._vectors[slot] = vector
+            if slot < len(self._labels):
+                self._labels[slot] = label
+            else:
+                self._labels.append(label)
+            self._next_slot = (slot + 1) % self.max_entries
+    
+    def _remember_exact(self, key: str, label: str) -> None:
+        """Store an exact-match entry, evicting the least recently used; call with the lock held"""
+        self._exact[key] = label
+        self._exact.move_to_end(key)
+        if len(self._exact) > self.max_entries:
+            self._exact.popitem(last=False)
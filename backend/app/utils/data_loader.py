@@ -4,24 +4,53 @@ Data loading utilities for synthetic cases and knowledge base
 
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import os
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Parsed JSON files keyed by path, stored with the (mtime_ns, size) they were
+# parsed at so an edited file is re-read on the next load
+_json_cache: Dict[str, Tuple[Tuple[int, int], List[Dict[str, Any]]]] = {}
+
+def _read_json_cached(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Parse a JSON file, reusing the previous parse if the file is unchanged
+    
+    The returned objects are shared with every later caller until the file
+    changes, so they must be treated as read-only.
+    """
+    stat = os.stat(file_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    
+    cached = _json_cache.get(file_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    _json_cache[file_path] = (signature, data)
+    return data
+
 class DataLoader:
     """Utility class for loading synthetic data and knowledge base"""
     
     @staticmethod
     def load_synthetic_cases(file_path: str = "data/synthetic/synthetic_clinical_cases.json") -> List[Dict[str, Any]]:
-        """Load synthetic clinical cases from JSON file"""
+        """
+        Load synthetic clinical cases from JSON file
+        
+        The list is a fresh copy, but the case dicts are shared with the parse
+        cache; copy a case before modifying it.
+        """
         try:
             if not Path(file_path).exists():
                 logger.warning(f"Synthetic cases file not found: {file_path}")
                 return []
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                cases = json.load(f)
+            cases = list(_read_json_cached(file_path))
             
             logger.info(f"Loaded {len(cases)} synthetic clinical cases")
             return cases
@@ -32,14 +61,18 @@ class DataLoader:
     
     @staticmethod
     def load_clinical_knowledge(file_path: str = "data/knowledge/clinical_knowledge_base.json") -> List[Dict[str, Any]]:
-        """Load clinical knowledge base from JSON file"""
+        """
+        Load clinical knowledge base from JSON file
+        
+        The list is a fresh copy, but the documents are shared with the parse
+        cache; copy a document before modifying it.
+        """
         try:
             if not Path(file_path).exists():
                 logger.warning(f"Knowledge base file not found: {file_path}")
                 return []
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                knowledge = json.load(f)
+            knowledge = list(_read_json_cached(file_path))
             
             logger.info(f"Loaded {len(knowledge)} knowledge base documents")
             return knowledge
@@ -50,7 +83,7 @@ class DataLoader:
     
     @staticmethod
     def get_case_by_id(case_id: str, cases: Optional[List[Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
-        """Get a specific case by ID"""
+        """Get a specific case by ID; the returned case is shared and read-only"""
         if cases is None:
             cases = DataLoader.load_synthetic_cases()
         
@@ -66,12 +99,8 @@ class DataLoader:
         if knowledge is None:
             knowledge = DataLoader.load_clinical_knowledge()
         
-        filtered_knowledge = []
-        for doc in knowledge:
-            if doc.get('disorder', '').lower() == disorder.lower():
-                filtered_knowledge.append(doc)
-        
-        return filtered_knowledge
+        target = disorder.lower()
+        return [doc for doc in knowledge if doc.get('disorder', '').lower() == target]
     
     @staticmethod
     def get_knowledge_by_type(doc_type: str, knowledge: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
@@ -79,12 +108,8 @@ class DataLoader:
         if knowledge is None:
             knowledge = DataLoader.load_clinical_knowledge()
         
-        filtered_knowledge = []
-        for doc in knowledge:
-            if doc.get('type', '').lower() == doc_type.lower():
-                filtered_knowledge.append(doc)
-        
-        return filtered_knowledge
+        target = doc_type.lower()
+        return [doc for doc in knowledge if doc.get('type', '').lower() == target]
     
     @staticmethod
     def validate_case_data(case: Dict[str, Any]) -> bool:
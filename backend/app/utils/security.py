@@ -2,16 +2,76 @@
 Security utilities for the therapy assistant application
 """
 
+import atexit
 import hashlib
+import hmac
+import queue
 import secrets
 import logging
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Dict, Any
 from functools import wraps
+from collections import deque
+from time import monotonic
 import re
 
 logger = logging.getLogger(__name__)
 
+# Request scanning patterns, one alternation per category so each string is
+# scanned once per category instead of once per pattern
+SQL_INJECTION_PATTERN = re.compile(
+    r'\b(UNION|SELECT|INSERT|UPDATE|DELETE|DROP)\b'
+    r'|[\'";].*[\'";]'
+    r'|--.*$'
+    r'|/\*.*\*/',
+    re.IGNORECASE
+)
+XSS_PATTERN = re.compile(
+    r'<script.*?>'
+    r'|javascript:'
+    r'|on\w+\s*='
+    r'|<iframe'
+    r'|<object',
+    re.IGNORECASE
+)
+
+# Union of every category, used as a single-pass prefilter so clean strings
+# (the common case) are scanned once in total rather than once per category
+SUSPICIOUS_PATTERN = re.compile(
+    f'{SQL_INJECTION_PATTERN.pattern}|{XSS_PATTERN.pattern}',
+    re.IGNORECASE
+)
+
+# Bit flags returned by scan_text
+SCAN_SQL_INJECTION = 1
+SCAN_XSS = 2
+SCAN_OVERSIZE = 4
+MAX_INPUT_LENGTH = 10000
+
+def scan_text(text: str) -> int:
+    """
+    Scan a single string for suspicious content
+    
+    Returns:
+        Bitmask of SCAN_* flags; 0 for clean input
+    """
+    flags = SCAN_OVERSIZE if len(text) > MAX_INPUT_LENGTH else 0
+    
+    if SUSPICIOUS_PATTERN.search(text):
+        if SQL_INJECTION_PATTERN.search(text):
+            flags |= SCAN_SQL_INJECTION
+        if XSS_PATTERN.search(text):
+            flags |= SCAN_XSS
+    
+    return flags
+
+# Directory traversal sequences, removed until none remain
+_TRAVERSAL_RE = re.compile(r'\.\.[\\/]')
+
+# Filename characters replaced with underscores
+_FILENAME_TRANSLATION = str.maketrans(dict.fromkeys('<>:"|?*', '_'))
+
 class SecurityManager:
     """Security utilities for application security"""
     
@@ -31,9 +91,8 @@ class SecurityManager:
         if salt is None:
             salt = secrets.token_hex(16)
         
-        # Use SHA-256 with salt
-        combined = f"{data}{salt}"
-        hashed = hashlib.sha256(combined.encode()).hexdigest()
+        # Keyed HMAC-SHA256 with the salt as key
+        hashed = hmac.new(salt.encode(), data.encode(), hashlib.sha256).hexdigest()
         
         return hashed, salt
     
@@ -41,20 +100,25 @@ class SecurityManager:
     def verify_hashed_data(data: str, hashed_data: str, salt: str) -> bool:
         """Verify data against its hash"""
         test_hash, _ = SecurityManager.hash_sensitive_data(data, salt)
-        return test_hash == hashed_data
+        return hmac.compare_digest(test_hash, hashed_data)
     
     @staticmethod
     def sanitize_filename(filename: str) -> str:
         """Sanitize filename to prevent directory traversal"""
-        # Remove directory traversal patterns
-        sanitized = re.sub(r'\.\.[\\/]', '', filename)
+        # Remove directory traversal patterns; removing one can join the
+        # characters around it into another, so repeat until none are left
+        sanitized, removed = _TRAVERSAL_RE.subn('', filename)
+        while removed:
+            sanitized, removed = _TRAVERSAL_RE.subn('', sanitized)
         
         # Remove or replace dangerous characters
-        sanitized = re.sub(r'[<>:"|?*]', '_', sanitized)
+        sanitized = sanitized.translate(_FILENAME_TRANSLATION)
         
         # Limit length
         if len(sanitized) > 255:
-            name, ext = sanitized.rsplit('.', 1) if '.' in sanitized else (sanitized, '')
+            name, dot, ext = sanitized.rpartition('.')
+            if not dot:
+                name, ext = ext, ''
             sanitized = name[:255-len(ext)-1] + ('.' + ext if ext else '')
         
         return sanitized
@@ -83,50 +147,37 @@ class SecurityManager:
             "blocked": False
         }
         
-        # Check for SQL injection patterns
-        sql_patterns = [
-            r'\b(UNION|SELECT|INSERT|UPDATE|DELETE|DROP)\b',
-            r'[\'";].*[\'";]',
-            r'--.*$',
-            r'/\*.*\*/'
-        ]
-        
-        # Check for XSS patterns  
-        xss_patterns = [
-            r'<script.*?>',
-            r'javascript:',
-            r'on\w+\s*=',
-            r'<iframe',
-            r'<object'
-        ]
-        
-        # Check all string values in request
-        def check_patterns(text: str, patterns: List[str], issue_type: str):
-            for pattern in patterns:
-                if re.search(pattern, text, re.IGNORECASE):
-                    analysis["risk_score"] += 5
-                    analysis["issues"].append(f"Potential {issue_type} detected")
-                    break
-        
-        # Recursively check all string values
-        def check_value(value, key=""):
+        # Walk the request with an explicit stack so deeply nested payloads
+        # cannot hit the recursion limit; each container is expanded once, so
+        # self-referencing payloads terminate
+        stack = [(request_data, "")]
+        expanded = set()
+        while stack:
+            value, key = stack.pop()
+            if isinstance(value, (dict, list)):
+                if id(value) in expanded:
+                    continue
+                expanded.add(id(value))
+            
             if isinstance(value, str):
-                check_patterns(value, sql_patterns, "SQL injection")
-                check_patterns(value, xss_patterns, "XSS attack")
-                
-                # Check for excessive length
-                if len(value) > 10000:
+                flags = scan_text(value)
+                if flags & SCAN_SQL_INJECTION:
+                    analysis["risk_score"] += 5
+                    analysis["issues"].append("Potential SQL injection detected")
+                if flags & SCAN_XSS:
+                    analysis["risk_score"] += 5
+                    analysis["issues"].append("Potential XSS attack detected")
+                if flags & SCAN_OVERSIZE:
                     analysis["risk_score"] += 3
                     analysis["issues"].append(f"Unusually long input in {key}")
                     
             elif isinstance(value, dict):
-                for k, v in value.items():
-                    check_value(v, k)
+                # Reversed so values are checked in document order
+                stack.extend((v, k) for k, v in reversed(list(value.items())))
             elif isinstance(value, list):
-                for i, item in enumerate(value):
-                    check_value(item, f"{key}[{i}]")
-        
-        check_value(request_data)
+                stack.extend(
+                    (value[i], f"{key}[{i}]") for i in range(len(value) - 1, -1, -1)
+                )
         
         # Block if risk score is too high
         if analysis["risk_score"] >= 10:
@@ -137,10 +188,23 @@ class SecurityManager:
 class RateLimiter:
     """Rate limiting for API endpoints"""
     
+    LOCK_SHARDS = 16
+    
     def __init__(self):
-        self.requests = {}  # {client_id: [(timestamp, count), ...]}
+        self.requests = {}  # {client_id: deque([monotonic_timestamp, ...])}
         self.cleanup_interval = 3600  # 1 hour
-        self.last_cleanup = datetime.now()
+        self.last_cleanup = monotonic()
+        
+        # Clients are spread over a fixed set of locks so concurrent requests
+        # only contend when their client ids share a shard
+        self._locks = [threading.Lock() for _ in range(self.LOCK_SHARDS)]
+        
+        # Held by whichever thread is running the periodic cleanup
+        self._cleanup_lock = threading.Lock()
+    
+    def _lock_for(self, client_id: str) -> threading.Lock:
+        """Return the lock guarding a client's request history"""
+        return self._locks[hash(client_id) % self.LOCK_SHARDS]
     
     def is_allowed(self, client_id: str, limit: int = 100, window: int = 3600) -> bool:
         """
@@ -154,54 +218,64 @@ class RateLimiter:
         Returns:
             True if request is allowed
         """
-        now = datetime.now()
-        
-        # Clean up old entries periodically
-        if (now - self.last_cleanup).seconds > self.cleanup_interval:
-            self._cleanup_old_entries()
-            self.last_cleanup = now
-        
-        # Initialize client if not exists
-        if client_id not in self.requests:
-            self.requests[client_id] = []
-        
-        # Remove entries outside current window
-        cutoff = now - timedelta(seconds=window)
-        self.requests[client_id] = [
-            (timestamp, count) for timestamp, count in self.requests[client_id]
-            if timestamp > cutoff
-        ]
+        now = monotonic()
         
-        # Count requests in current window
-        current_count = sum(count for _, count in self.requests[client_id])
+        # Clean up old entries periodically; threads arriving while another
+        # one is cleaning up skip it rather than wait
+        if now - self.last_cleanup > self.cleanup_interval and self._cleanup_lock.acquire(blocking=False):
+            try:
+                # Re-check in case another thread finished a cleanup meanwhile
+                if now - self.last_cleanup > self.cleanup_interval:
+                    self._cleanup_old_entries()
+                    self.last_cleanup = now
+            finally:
+                self._cleanup_lock.release()
         
-        if current_count >= limit:
-            logger.warning(f"Rate limit exceeded for client {client_id}: {current_count}/{limit}")
-            return False
+        with self._lock_for(client_id):
+            timestamps = self.requests.setdefault(client_id, deque())
+            
+            # Drop entries outside current window; timestamps are appended in
+            # order so expired ones are always at the left
+            cutoff = now - window
+            while timestamps and timestamps[0] <= cutoff:
+                timestamps.popleft()
+            
+            current_count = len(timestamps)
+            if current_count < limit:
+                # Add current request
+                timestamps.append(now)
+                return True
         
-        # Add current request
-        self.requests[client_id].append((now, 1))
-        return True
+        logger.warning(f"Rate limit exceeded for client {client_id}: {current_count}/{limit}")
+        return False
     
     def _cleanup_old_entries(self):
         """Remove old rate limiting entries"""
-        cutoff = datetime.now() - timedelta(seconds=7200)  # 2 hours
+        cutoff = monotonic() - 7200  # 2 hours
         
         for client_id in list(self.requests.keys()):
-            self.requests[client_id] = [
-                (timestamp, count) for timestamp, count in self.requests[client_id]
-                if timestamp > cutoff
-            ]
-            
-            # Remove empty entries
-            if not self.requests[client_id]:
-                del self.requests[client_id]
+            with self._lock_for(client_id):
+                timestamps = self.requests.get(client_id)
+                if timestamps is None:
+                    continue
+                
+                while timestamps and timestamps[0] <= cutoff:
+                    timestamps.popleft()
+                
+                # Remove empty entries
+                if not timestamps:
+                    del self.requests[client_id]
 
-class AuditLogger:
-    """Security audit logging"""
-    
-    def __init__(self):
-        self.logger = logging.getLogger("security_audit")
+# Background writer shared by every AuditLogger, started on first use
+_audit_listener: Optional[QueueListener] = None
+_audit_listener_lock = threading.Lock()
+
+def _start_audit_listener() -> QueueListener:
+    """Attach the audit queue and file writer to the security_audit logger, once per process"""
+    global _audit_listener
+    with _audit_listener_lock:
+        if _audit_listener is not None:
+            return _audit_listener
         
         # Create separate handler for security logs
         handler = logging.FileHandler("security_audit.log")
@@ -209,8 +283,25 @@ class AuditLogger:
             '%(asctime)s - SECURITY - %(levelname)s - %(message)s'
         )
         handler.setFormatter(formatter)
-        self.logger.addHandler(handler)
-        self.logger.setLevel(logging.INFO)
+        
+        # Request threads only enqueue records; file writes happen on the
+        # listener's background thread
+        log_queue = queue.SimpleQueue()
+        audit = logging.getLogger("security_audit")
+        audit.addHandler(QueueHandler(log_queue))
+        audit.setLevel(logging.INFO)
+        
+        _audit_listener = QueueListener(log_queue, handler)
+        _audit_listener.start()
+        atexit.register(_audit_listener.stop)
+        return _audit_listener
+
+class AuditLogger:
+    """Security audit logging"""
+    
+    def __init__(self):
+        self.logger = logging.getLogger("security_audit")
+        self._listener = _start_audit_listener()
     
     def log_authentication_attempt(self, user_id: str, success: bool, ip_address: str):
         """Log authentication attempt"""
@@ -243,26 +334,54 @@ def require_https(func):
         return func(*args, **kwargs)
     return wrapper
 
+def _sanitize_string(value: str) -> str:
+    """Sanitize a single string value"""
+    # Remove null bytes; the membership test is a memchr scan and skips the
+    # replace call entirely for clean input
+    if '\x00' in value:
+        value = value.replace('\x00', '')
+    
+    # Limit length
+    if len(value) > MAX_INPUT_LENGTH:
+        value = value[:MAX_INPUT_LENGTH]
+    
+    return value.strip()
+
 def sanitize_input(data: Any) -> Any:
     """Sanitize input data recursively"""
     if isinstance(data, str):
-        # Remove null bytes
-        sanitized = data.replace('\x00', '')
-        
-        # Limit length
-        if len(sanitized) > 10000:
-            sanitized = sanitized[:10000]
-        
-        return sanitized.strip()
-    
-    elif isinstance(data, dict):
-        return {k: sanitize_input(v) for k, v in data.items()}
+        return _sanitize_string(data)
+    if not isinstance(data, (dict, list)):
+        return data
     
-    elif isinstance(data, list):
-        return [sanitize_input(item) for item in data]
+    # Build the sanitized tree iteratively: containers are created empty and
+    # filled when popped, so nesting depth is not bounded by the call stack.
+    # Copies are keyed by source container, so a container reached twice
+    # (including through a cycle) is copied once and the shape is preserved
+    result = {} if isinstance(data, dict) else []
+    copies = {id(data): result}
+    stack = [(data, result)]
+    while stack:
+        source, target = stack.pop()
+        items = source.items() if isinstance(source, dict) else enumerate(source)
+        for key, value in items:
+            if isinstance(value, str):
+                sanitized = _sanitize_string(value)
+            elif isinstance(value, (dict, list)):
+                sanitized = copies.get(id(value))
+                if sanitized is None:
+                    sanitized = {} if isinstance(value, dict) else []
+                    copies[id(value)] = sanitized
+                    stack.append((value, sanitized))
+            else:
+                sanitized = value
+            
+            if isinstance(target, dict):
+                target[key] = sanitized
+            else:
+                target.append(sanitized)
     
-    else:
-        return data
+    return result
 
 def check_content_security_policy() -> Dict[str, str]:
     """Generate Content Security Policy headers"""
@@ -4,29 +4,76 @@ Input validation utilities for the therapy assistant application
 
 import re
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel, validator, Field
+from functools import lru_cache
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter, field_validator
 from datetime import datetime
 
+# Content requiring immediate clinical attention
+_FORBIDDEN_SYMPTOM_PATTERN = re.compile(
+    r'\b(?:harm|kill|suicide|medication.*dosage|prescription.*change)\b',
+    re.IGNORECASE
+)
+
+# Injection patterns for clinical content, one alternation per category
+_SQL_INJECTION_PATTERN = re.compile(
+    r'\b(?:SELECT|INSERT|UPDATE|DELETE|DROP|UNION)\b'
+    r'|[\'";].*[\'";]'
+    r'|--.*$',
+    re.IGNORECASE
+)
+_SCRIPT_INJECTION_PATTERN = re.compile(
+    r'<script.*?>'
+    r'|javascript:'
+    r'|on\w+\s*=',
+    re.IGNORECASE
+)
+
+# Characters stripped from free-text input
+_HARMFUL_CHARS_PATTERN = re.compile(r'[<>{}();]')
+
+# Password character categories as bit flags, with a lookup table for ASCII
+_UPPER, _LOWER, _DIGIT = 1, 2, 4
+_REQUIRED_PASSWORD_CATEGORIES = _UPPER | _LOWER | _DIGIT
+_ASCII_CATEGORIES = bytes(
+    (_UPPER if chr(code).isupper() else 0)
+    | (_LOWER if chr(code).islower() else 0)
+    | (_DIGIT if chr(code).isdigit() else 0)
+    for code in range(128)
+)
+
+def _password_categories(password: str) -> int:
+    """Return the category bitmask for a password in a single pass"""
+    mask = 0
+    for char in password:
+        code = ord(char)
+        if code < 128:
+            mask |= _ASCII_CATEGORIES[code]
+        else:
+            mask |= (
+                (_UPPER if char.isupper() else 0)
+                | (_LOWER if char.islower() else 0)
+                | (_DIGIT if char.isdigit() else 0)
+            )
+        
+        if mask & _REQUIRED_PASSWORD_CATEGORIES == _REQUIRED_PASSWORD_CATEGORIES:
+            break
+    
+    return mask
+
 class DiagnosticRequestValidator(BaseModel):
     """Validator for diagnostic assistance requests"""
     symptoms: str = Field(..., min_length=10, max_length=2000)
     patient_context: Optional[str] = Field(None, max_length=1000)
     
-    @validator('symptoms')
+    @field_validator('symptoms')
+    @classmethod
     def validate_symptoms(cls, v):
         if not v or v.strip() == "":
             raise ValueError("Symptoms cannot be empty")
         
         # Check for potentially harmful content
-        forbidden_patterns = [
-            r'\b(harm|kill|suicide)\b',
-            r'\b(medication.*dosage)\b',
-            r'\b(prescription.*change)\b'
-        ]
-        
-        for pattern in forbidden_patterns:
-            if re.search(pattern, v.lower()):
-                raise ValueError("Input contains content requiring immediate clinical attention")
+        if _FORBIDDEN_SYMPTOM_PATTERN.search(v):
+            raise ValueError("Input contains content requiring immediate clinical attention")
         
         return v.strip()
 
@@ -35,7 +82,8 @@ class TreatmentRequestValidator(BaseModel):
     diagnosis: str = Field(..., min_length=3, max_length=200)
     patient_context: Optional[str] = Field(None, max_length=1000)
     
-    @validator('diagnosis')
+    @field_validator('diagnosis')
+    @classmethod
     def validate_diagnosis(cls, v):
         if not v or v.strip() == "":
             raise ValueError("Diagnosis cannot be empty")
@@ -48,30 +96,29 @@ class TreatmentRequestValidator(BaseModel):
 
 class UserRegistrationValidator(BaseModel):
     """Validator for user registration"""
-    email: str = Field(..., regex=r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
-    username: str = Field(..., min_length=3, max_length=50, regex=r'^[a-zA-Z0-9_-]+$')
+    email: EmailStr
+    username: str = Field(..., min_length=3, max_length=50, pattern=r'^[a-zA-Z0-9_-]+$')
     password: str = Field(..., min_length=8, max_length=128)
     first_name: str = Field(..., min_length=1, max_length=50)
     last_name: str = Field(..., min_length=1, max_length=50)
     
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password(cls, v):
         """Validate password strength"""
         if len(v) < 8:
             raise ValueError("Password must be at least 8 characters long")
         
         # Check for required character types
-        has_upper = any(c.isupper() for c in v)
-        has_lower = any(c.islower() for c in v)
-        has_digit = any(c.isdigit() for c in v)
-        has_special = any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in v)
+        categories = _password_categories(v)
         
-        if not all([has_upper, has_lower, has_digit]):
+        if categories & _REQUIRED_PASSWORD_CATEGORIES != _REQUIRED_PASSWORD_CATEGORIES:
             raise ValueError("Password must contain uppercase, lowercase, and numeric characters")
         
         return v
     
-    @validator('first_name', 'last_name')
+    @field_validator('first_name', 'last_name')
+    @classmethod
     def validate_names(cls, v):
         """Validate name fields"""
         if not v.replace(" ", "").replace("-", "").replace("'", "").isalpha():
@@ -81,9 +128,10 @@ class UserRegistrationValidator(BaseModel):
 
 class CaseAnalysisValidator(BaseModel):
     """Validator for case analysis requests"""
-    case_id: str = Field(..., regex=r'^[A-Z0-9_-]+$', max_length=50)
+    case_id: str = Field(..., pattern=r'^[A-Z0-9_-]+$', max_length=50)
     
-    @validator('case_id')
+    @field_validator('case_id')
+    @classmethod
     def validate_case_id(cls, v):
         if not v or v.strip() == "":
             raise ValueError("Case ID cannot be empty")
@@ -93,18 +141,41 @@ class CaseAnalysisValidator(BaseModel):
 class KnowledgeSearchValidator(BaseModel):
     """Validator for knowledge base search"""
     query: str = Field(..., min_length=2, max_length=500)
-    doc_type: Optional[str] = Field(None, regex=r'^[a-z_]+$')
+    doc_type: Optional[str] = Field(None, pattern=r'^[a-z_]+$')
     disorder: Optional[str] = Field(None, max_length=100)
     
-    @validator('query')
+    @field_validator('query')
+    @classmethod
     def validate_query(cls, v):
         if not v or v.strip() == "":
             raise ValueError("Search query cannot be empty")
         
         # Remove potentially harmful characters
-        cleaned = re.sub(r'[<>{}();]', '', v)
+        cleaned = _HARMFUL_CHARS_PATTERN.sub('', v)
         return cleaned.strip()
 
+@lru_cache(maxsize=None)
+def _batch_adapter(validator_cls: type) -> TypeAdapter:
+    """Build (once per validator class) an adapter for lists of that model"""
+    return TypeAdapter(List[validator_cls])
+
+def validate_batch(validator_cls: type, items: List[Dict[str, Any]]) -> List[BaseModel]:
+    """
+    Validate many request payloads against one validator in a single call
+    
+    Args:
+        validator_cls: Validator model class, e.g. DiagnosticRequestValidator
+        items: Raw request payloads
+        
+    Returns:
+        List of validated model instances
+        
+    Raises:
+        pydantic.ValidationError: If any payload is invalid; errors are
+            reported with the index of the offending item
+    """
+    return _batch_adapter(validator_cls).validate_python(items)
+
 def validate_clinical_content(text: str) -> bool:
     """
     Validate that clinical content is appropriate and safe
@@ -119,26 +190,12 @@ def validate_clinical_content(text: str) -> bool:
         return False
     
     # Check for SQL injection patterns
-    sql_patterns = [
-        r'\b(SELECT|INSERT|UPDATE|DELETE|DROP|UNION)\b',
-        r'[\'";].*[\'";]',
-        r'--.*$'
-    ]
-    
-    for pattern in sql_patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            return False
+    if _SQL_INJECTION_PATTERN.search(text):
+        return False
     
     # Check for script injection
-    script_patterns = [
-        r'<script.*?>',
-        r'javascript:',
-        r'on\w+\s*='
-    ]
-    
-    for pattern in script_patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            return False
+    if _SCRIPT_INJECTION_PATTERN.search(text):
+        return False
     
     return True
 
@@ -156,7 +213,7 @@ def sanitize_user_input(text: str) -> str:
         return ""
     
     # Remove potentially harmful characters
-    sanitized = re.sub(r'[<>{}();]', '', text)
+    sanitized = _HARMFUL_CHARS_PATTERN.sub('', text)
     
     # Limit length
     if len(sanitized) > 2000:
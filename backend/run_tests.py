@@ -5,11 +5,17 @@ Provides convenient commands for running different types of tests
 """
 
 import argparse
+import importlib.metadata
+import importlib.util
 import subprocess
 import sys
 import os
+import shutil
 from pathlib import Path
 
+# Run pytest under this interpreter rather than whatever "python" is on PATH
+PYTEST_BASE = (sys.executable, "-m", "pytest")
+
 
 def run_command(cmd, description=""):
     """Run a command and return the result."""
@@ -28,9 +34,24 @@ def run_command(cmd, description=""):
         return True
 
 
-def run_unit_tests(verbose=False, coverage=True):
+def add_parallel_args(cmd, jobs):
+    """Distribute tests over pytest-xdist workers unless running serially."""
+    if str(jobs) != "1":
+        # loadfile keeps each test module on one worker, so module-scoped
+        # fixtures (seeded users, tokens) are built once per module
+        cmd.extend(["-n", str(jobs), "--dist=loadfile"])
+
+
+def add_ordering_args(cmd):
+    """Run previously failing tests, then new tests, before everything else."""
+    # Only meaningful once pytest's cache holds a previous run
+    if Path(".pytest_cache").is_dir():
+        cmd.extend(["--failed-first", "--new-first"])
+
+
+def run_unit_tests(verbose=False, coverage=True, jobs="auto"):
     """Run unit tests."""
-    cmd = ["python", "-m", "pytest", "tests/unit/"]
+    cmd = [*PYTEST_BASE, "tests/unit/"]
     
     if verbose:
         cmd.append("-v")
@@ -41,12 +62,15 @@ def run_unit_tests(verbose=False, coverage=True):
     cmd.append("-m")
     cmd.append("unit")
     
+    add_ordering_args(cmd)
+    add_parallel_args(cmd, jobs)
+    
     return run_command(cmd, "Running Unit Tests")
 
 
-def run_integration_tests(verbose=False):
+def run_integration_tests(verbose=False, jobs="auto"):
     """Run integration tests."""
-    cmd = ["python", "-m", "pytest", "tests/integration/"]
+    cmd = [*PYTEST_BASE, "tests/integration/"]
     
     if verbose:
         cmd.append("-v")
@@ -54,12 +78,15 @@ def run_integration_tests(verbose=False):
     cmd.append("-m")
     cmd.append("integration")
     
+    add_ordering_args(cmd)
+    add_parallel_args(cmd, jobs)
+    
     return run_command(cmd, "Running Integration Tests")
 
 
-def run_all_tests(verbose=False, coverage=True):
+def run_all_tests(verbose=False, coverage=True, jobs="auto"):
     """Run all tests."""
-    cmd = ["python", "-m", "pytest", "tests/"]
+    cmd = [*PYTEST_BASE, "tests/"]
     
     if verbose:
         cmd.append("-v")
@@ -67,53 +94,73 @@ def run_all_tests(verbose=False, coverage=True):
     if coverage:
         cmd.extend(["--cov=app", "--cov-report=term-missing", "--cov-report=html"])
     
+    add_ordering_args(cmd)
+    add_parallel_args(cmd, jobs)
+    
     return run_command(cmd, "Running All Tests")
 
 
-def run_specific_tests(test_path, verbose=False):
+def run_specific_tests(test_path, verbose=False, jobs="auto"):
     """Run specific test file or directory."""
-    cmd = ["python", "-m", "pytest", test_path]
+    cmd = [*PYTEST_BASE, test_path]
     
     if verbose:
         cmd.append("-v")
     
+    add_ordering_args(cmd)
+    add_parallel_args(cmd, jobs)
+    
     return run_command(cmd, f"Running Tests: {test_path}")
 
 
-def run_tests_by_marker(marker, verbose=False):
+def run_tests_by_marker(marker, verbose=False, jobs="auto"):
     """Run tests with specific marker."""
-    cmd = ["python", "-m", "pytest", "-m", marker, "tests/"]
+    cmd = [*PYTEST_BASE, "-m", marker, "tests/"]
     
     if verbose:
         cmd.append("-v")
     
+    add_ordering_args(cmd)
+    add_parallel_args(cmd, jobs)
+    
     return run_command(cmd, f"Running Tests with Marker: {marker}")
 
 
-def run_failed_tests():
+def run_failed_tests(jobs="auto"):
     """Run only failed tests from last run."""
-    cmd = ["python", "-m", "pytest", "--lf", "tests/"]
+    cmd = [*PYTEST_BASE, "--lf", "tests/"]
+    
+    add_parallel_args(cmd, jobs)
     
     return run_command(cmd, "Running Failed Tests from Last Run")
 
 
-def run_coverage_report():
+def run_coverage_report(jobs="auto"):
     """Generate coverage report."""
-    cmd = ["python", "-m", "pytest", "--cov=app", "--cov-report=html", "--cov-report=term", "tests/"]
+    cmd = [*PYTEST_BASE, "--cov=app", "--cov-report=html", "--cov-report=term", "tests/"]
+    
+    add_ordering_args(cmd)
+    add_parallel_args(cmd, jobs)
     
     return run_command(cmd, "Generating Coverage Report")
 
 
-def run_performance_tests():
+def run_performance_tests(jobs="auto"):
     """Run performance tests."""
-    cmd = ["python", "-m", "pytest", "-m", "performance", "tests/"]
+    cmd = [*PYTEST_BASE, "-m", "performance", "tests/"]
+    
+    add_ordering_args(cmd)
+    add_parallel_args(cmd, jobs)
     
     return run_command(cmd, "Running Performance Tests")
 
 
-def run_security_tests():
+def run_security_tests(jobs="auto"):
     """Run security tests."""
-    cmd = ["python", "-m", "pytest", "-m", "security", "tests/"]
+    cmd = [*PYTEST_BASE, "-m", "security", "tests/"]
+    
+    add_ordering_args(cmd)
+    add_parallel_args(cmd, jobs)
     
     return run_command(cmd, "Running Security Tests")
 
@@ -123,11 +170,10 @@ def check_test_environment():
     print("🔍 Checking Test Environment")
     print("=" * 50)
     
-    # Check if pytest is installed
+    # Check if pytest is installed; metadata lookup avoids importing it
     try:
-        import pytest
-        print(f"✅ pytest is installed (version: {pytest.__version__})")
-    except ImportError:
+        print(f"✅ pytest is installed (version: {importlib.metadata.version('pytest')})")
+    except importlib.metadata.PackageNotFoundError:
         print("❌ pytest is not installed")
         return False
     
@@ -135,17 +181,21 @@ def check_test_environment():
     required_packages = [
         'pytest-asyncio',
         'pytest-cov',
+        'pytest-xdist',
         'httpx',
         'fastapi',
         'sqlalchemy'
     ]
     
+    # Distribution names whose import name differs from the dashed form
+    import_names = {'pytest-xdist': 'xdist'}
+    
+    # find_spec only locates each package, without running its import
     missing_packages = []
     for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
+        if importlib.util.find_spec(import_names.get(package, package.replace('-', '_'))):
             print(f"✅ {package} is available")
-        except ImportError:
+        else:
             missing_packages.append(package)
             print(f"❌ {package} is not installed")
     
@@ -166,9 +216,20 @@ def check_test_environment():
         "tests/integration/test_api_integration.py"
     ]
     
+    # List each test directory once and check names against the listing
+    # instead of stat-ing every file separately
+    directory_listings = {}
+    for parent in {os.path.dirname(test_file) for test_file in test_files}:
+        try:
+            with os.scandir(parent) as entries:
+                directory_listings[parent] = {entry.name for entry in entries}
+        except OSError:
+            directory_listings[parent] = set()
+    
     missing_files = []
     for test_file in test_files:
-        if Path(test_file).exists():
+        parent, name = os.path.split(test_file)
+        if name in directory_listings[parent]:
             print(f"✅ {test_file} exists")
         else:
             missing_files.append(test_file)
@@ -187,35 +248,33 @@ def clean_test_artifacts():
     print("🧹 Cleaning Test Artifacts")
     print("=" * 50)
     
-    artifacts = [
-        ".pytest_cache",
-        ".coverage",
-        "htmlcov",
-        "coverage.xml",
-        "__pycache__",
-        "*.pyc"
-    ]
-    
-    for artifact in artifacts:
-        if artifact.endswith("*"):
-            # Handle glob patterns
-            import glob
-            for file in glob.glob(f"**/{artifact}", recursive=True):
+    # Run-level artifacts live next to this script; caches can be anywhere
+    top_level_dirs = {".pytest_cache", "htmlcov"}
+    top_level_files = {".coverage", "coverage.xml"}
+    nested_dirs = {"__pycache__"}
+    nested_suffixes = (".pyc",)
+    skip_dirs = {".git", "venv", ".venv", "node_modules"}
+    
+    # Single walk over the tree, deleting matches inline
+    for root, dirs, files in os.walk("."):
+        at_top = root == "."
+        for name in list(dirs):
+            path = os.path.join(root, name)
+            if name in nested_dirs or (at_top and name in top_level_dirs):
+                shutil.rmtree(path, ignore_errors=True)
+                print(f"🗑️  Removed directory {os.path.relpath(path)}")
+                dirs.remove(name)
+            elif name in skip_dirs:
+                dirs.remove(name)
+        
+        for name in files:
+            if name.endswith(nested_suffixes) or (at_top and name in top_level_files):
+                path = os.path.join(root, name)
                 try:
-                    os.remove(file)
-                    print(f"🗑️  Removed {file}")
+                    os.remove(path)
+                    print(f"🗑️  Removed file {os.path.relpath(path)}")
                 except OSError:
                     pass
-        else:
-            # Handle directories and files
-            if Path(artifact).exists():
-                import shutil
-                if Path(artifact).is_dir():
-                    shutil.rmtree(artifact)
-                    print(f"🗑️  Removed directory {artifact}")
-                else:
-                    os.remove(artifact)
-                    print(f"🗑️  Removed file {artifact}")
     
     print("✅ Cleanup completed!")
 
@@ -228,6 +287,7 @@ def main():
         epilog="""
 Examples:
   python run_tests.py --unit                 # Run unit tests
+  python run_tests.py --unit -j 1            # Run unit tests serially
   python run_tests.py --integration          # Run integration tests
   python run_tests.py --all                  # Run all tests
   python run_tests.py --marker auth          # Run auth tests
@@ -252,6 +312,8 @@ Examples:
     parser.add_argument("--clean", action="store_true", help="Clean test artifacts")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
     parser.add_argument("--no-coverage", action="store_true", help="Disable coverage")
+    parser.add_argument("--jobs", "-j", type=str, default="auto",
+                        help="Number of pytest-xdist workers ('auto' for one per CPU, 1 to run serially)")
     
     args = parser.parse_args()
     
@@ -271,23 +333,23 @@ Examples:
     elif args.clean:
         clean_test_artifacts()
     elif args.unit:
-        success = run_unit_tests(args.verbose, not args.no_coverage)
+        success = run_unit_tests(args.verbose, not args.no_coverage, args.jobs)
     elif args.integration:
-        success = run_integration_tests(args.verbose)
+        success = run_integration_tests(args.verbose, args.jobs)
     elif args.all:
-        success = run_all_tests(args.verbose, not args.no_coverage)
+        success = run_all_tests(args.verbose, not args.no_coverage, args.jobs)
     elif args.marker:
-        success = run_tests_by_marker(args.marker, args.verbose)
+        success = run_tests_by_marker(args.marker, args.verbose, args.jobs)
     elif args.file:
-        success = run_specific_tests(args.file, args.verbose)
+        success = run_specific_tests(args.file, args.verbose, args.jobs)
     elif args.failed:
-        success = run_failed_tests()
+        success = run_failed_tests(args.jobs)
     elif args.coverage:
-        success = run_coverage_report()
+        success = run_coverage_report(args.jobs)
     elif args.performance:
-        success = run_performance_tests()
+        success = run_performance_tests(args.jobs)
     elif args.security:
-        success = run_security_tests()
+        success = run_security_tests(args.jobs)
     else:
         print("❌ No valid option specified. Use --help for usage information.")
         success = False
@@ -5,44 +5,158 @@ Runs multiple code quality tools and provides optimization recommendations.
 """
 
 import argparse
+import hashlib
 import os
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Callable, Iterator, List, Dict, Any, Optional
 import json
 
 
+# Directories that never hold project sources
+SKIP_DIRS = {"__pycache__", ".git", ".venv", "venv", ".mypy_cache", ".pytest_cache"}
+
+
+def iter_py_files(root) -> Iterator[str]:
+    """Yield paths of Python files under root.
+    
+    Uses os.scandir so file type checks come from the directory listing
+    itself instead of a stat() per entry.
+    """
+    stack = [str(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.name.endswith(".py") and entry.is_file():
+                        yield entry.path
+        except OSError:
+            continue
+
+
 class CodeAnalyzer:
     """Runs code analysis tools and generates reports."""
     
-    def __init__(self, project_root: str):
+    # Files besides the sources that change tool output when edited
+    CONFIG_FILES = ("pyproject.toml", "setup.cfg", ".flake8", "mypy.ini")
+    
+    def __init__(self, project_root: str, use_cache: bool = True):
         self.project_root = Path(project_root)
         self.app_dir = self.project_root / "app"
         self.results = {}
+        self._app_tree_scan = None
+        
+        # Results of read-only tool runs keyed by tool and input content hash
+        self.cache_file = self.project_root / ".lint_cache" / "results.json"
+        self.use_cache = use_cache
+        self._cache = self._load_cache() if use_cache else {}
+        self._used_cache_keys = set()
+        self._input_digests = {}
     
-    def run_command(self, cmd: List[str], description: str) -> Dict[str, Any]:
-        """Run a command and capture results."""
-        print(f"\n🔍 {description}")
-        print("=" * 60)
-        print(f"Running: {' '.join(cmd)}")
+    def _load_cache(self) -> Dict[str, Any]:
+        """Load cached tool results from a previous run."""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+    
+    def save_cache(self) -> None:
+        """Persist the tool results used in this run.
+        
+        Entries not looked up during the run belong to file contents that no
+        longer exist, so only the keys used this time are written back.
+        """
+        if not self.use_cache:
+            return
+        
+        cache = {key: self._cache[key] for key in self._used_cache_keys if key in self._cache}
+        self.cache_file.parent.mkdir(exist_ok=True)
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, default=str)
+    
+    def _inputs_digest(self, paths: tuple) -> str:
+        """Hash the contents of every Python file under paths plus tool config."""
+        if paths in self._input_digests:
+            return self._input_digests[paths]
+        
+        digest = hashlib.blake2b(digest_size=16)
+        files = [os.path.join(self.project_root, name) for name in self.CONFIG_FILES]
+        for path in paths:
+            files.extend(sorted(iter_py_files(self.project_root / path)))
+        
+        for file_path in files:
+            try:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            digest.update(os.path.relpath(file_path, self.project_root).encode())
+            digest.update(data)
+        
+        self._input_digests[paths] = digest.hexdigest()
+        return self._input_digests[paths]
+    
+    def run_command(
+        self,
+        cmd: List[str],
+        description: str,
+        cache_name: Optional[str] = None,
+        cache_inputs: tuple = (),
+        cache_cmd: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Run a command and capture results.
+        
+        When cache_name is given the command must not modify files; its result
+        is reused as long as the files under cache_inputs and the command line
+        (cache_cmd, defaulting to cmd) are unchanged.
+        """
+        cache_key = None
+        if cache_name and self.use_cache:
+            cmd_digest = hashlib.blake2b(
+                "\0".join(cache_cmd or cmd).encode(), digest_size=8
+            ).hexdigest()
+            cache_key = f"{cache_name}:{cmd_digest}:{self._inputs_digest(cache_inputs)}"
+            self._used_cache_keys.add(cache_key)
+            if cache_key in self._cache:
+                print(f"\n🔍 {description}\n{'=' * 60}\nUnchanged inputs, reusing cached result")
+                return self._cache[cache_key]
+        
+        # Single print so headers stay intact when tools run concurrently
+        print(f"\n🔍 {description}\n{'=' * 60}\nRunning: {' '.join(cmd)}")
         
         try:
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                cwd=self.project_root
-            )
+            # The tool writes straight into temp files, so no pipe has to be
+            # drained while it runs; output is decoded once at the end
+            with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+                completed = subprocess.run(
+                    cmd,
+                    stdout=out,
+                    stderr=err,
+                    cwd=self.project_root
+                )
+                out.seek(0)
+                err.seek(0)
+                stdout = out.read().decode("utf-8", "replace")
+                stderr = err.read().decode("utf-8", "replace")
             
-            return {
+            result = {
                 "command": " ".join(cmd),
-                "return_code": result.returncode,
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "success": result.returncode == 0
+                "return_code": completed.returncode,
+                "stdout": stdout,
+                "stderr": stderr,
+                "success": completed.returncode == 0
             }
         except Exception as e:
+            # Launch failures (e.g. tool not installed) are never cached
             return {
                 "command": " ".join(cmd),
                 "return_code": -1,
@@ -50,6 +164,11 @@ class CodeAnalyzer:
                 "stderr": str(e),
                 "success": False
             }
+        
+        # A missing tool says nothing about the code, so it is not cached
+        if cache_key and "No module named" not in stderr:
+            self._cache[cache_key] = result
+        return result
     
     def run_black(self, fix: bool = False) -> Dict[str, Any]:
         """Run Black code formatter."""
@@ -58,7 +177,10 @@ class CodeAnalyzer:
             cmd.append("--check")
         cmd.extend(["app", "tests", "scripts"])
         
-        result = self.run_command(cmd, "Code Formatting (Black)")
+        result = self.run_command(
+            cmd, "Code Formatting (Black)",
+            cache_name=None if fix else "black", cache_inputs=("app", "tests", "scripts")
+        )
         self.results["black"] = result
         return result
     
@@ -66,10 +188,14 @@ class CodeAnalyzer:
         """Run isort import sorter."""
         cmd = ["python", "-m", "isort"]
         if not fix:
-            cmd.append("--check-only")
+            # Pass/fail comes from the exit code; skip the per-file listing
+            cmd.extend(["--check-only", "--quiet"])
         cmd.extend(["app", "tests", "scripts"])
         
-        result = self.run_command(cmd, "Import Sorting (isort)")
+        result = self.run_command(
+            cmd, "Import Sorting (isort)",
+            cache_name=None if fix else "isort", cache_inputs=("app", "tests", "scripts")
+        )
         self.results["isort"] = result
         return result
     
@@ -87,15 +213,22 @@ class CodeAnalyzer:
             cmd.append("--in-place")
         cmd.extend(["app", "tests", "scripts"])
         
-        result = self.run_command(cmd, "Remove Unused Imports (autoflake)")
+        result = self.run_command(
+            cmd, "Remove Unused Imports (autoflake)",
+            cache_name=None if fix else "autoflake", cache_inputs=("app", "tests", "scripts")
+        )
         self.results["autoflake"] = result
         return result
     
     def run_flake8(self) -> Dict[str, Any]:
         """Run flake8 linter."""
-        cmd = ["python", "-m", "flake8", "app", "tests", "scripts"]
+        # Only the violation total is reported, so flake8 prints just that
+        cmd = ["python", "-m", "flake8", "-qq", "--count", "app", "tests", "scripts"]
         
-        result = self.run_command(cmd, "Code Linting (flake8)")
+        result = self.run_command(
+            cmd, "Code Linting (flake8)",
+            cache_name="flake8", cache_inputs=("app", "tests", "scripts")
+        )
         self.results["flake8"] = result
         return result
     
@@ -103,30 +236,42 @@ class CodeAnalyzer:
         """Run mypy type checker."""
         cmd = ["python", "-m", "mypy", "app"]
         
-        result = self.run_command(cmd, "Type Checking (mypy)")
+        result = self.run_command(
+            cmd, "Type Checking (mypy)", cache_name="mypy", cache_inputs=("app",)
+        )
         self.results["mypy"] = result
         return result
     
     def run_bandit(self) -> Dict[str, Any]:
         """Run bandit security linter."""
-        cmd = [
-            "python", "-m", "bandit", 
-            "-r", "app",
-            "-f", "json",
-            "-x", "*/tests/*"
-        ]
-        
-        result = self.run_command(cmd, "Security Analysis (bandit)")
-        self.results["bandit"] = result
-        
-        # Parse JSON output for better reporting
-        if result["success"] and result["stdout"]:
-            try:
-                bandit_data = json.loads(result["stdout"])
-                result["issues"] = bandit_data.get("results", [])
-                result["metrics"] = bandit_data.get("metrics", {})
-            except json.JSONDecodeError:
-                pass
+        # Bandit writes its JSON report to a file that is parsed straight
+        # from disk, rather than piping the whole report through stdout
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            report_path = os.path.join(tmp_dir, "bandit.json")
+            cmd = [
+                "python", "-m", "bandit", 
+                "-r", "app",
+                "-f", "json",
+                "-o", report_path,
+                "-x", "*/tests/*"
+            ]
+            
+            # The report path differs on every run, so it is left out of the key
+            result = self.run_command(
+                cmd, "Security Analysis (bandit)", cache_name="bandit", cache_inputs=("app",),
+                cache_cmd=[arg for arg in cmd if arg not in ("-o", report_path)]
+            )
+            self.results["bandit"] = result
+            
+            # Parse JSON output for better reporting
+            if os.path.exists(report_path):
+                try:
+                    with open(report_path, 'r', encoding='utf-8') as f:
+                        bandit_data = json.load(f)
+                    result["issues"] = bandit_data.get("results", [])
+                    result["metrics"] = bandit_data.get("metrics", {})
+                except json.JSONDecodeError:
+                    pass
         
         return result
     
@@ -155,7 +300,9 @@ class CodeAnalyzer:
             "--json"
         ]
         
-        result = self.run_command(cmd, "Complexity Analysis (radon)")
+        result = self.run_command(
+            cmd, "Complexity Analysis (radon)", cache_name="radon", cache_inputs=("app",)
+        )
         self.results["complexity"] = result
         
         # Parse complexity results
@@ -178,31 +325,66 @@ class CodeAnalyzer:
         
         return result
     
-    def analyze_imports(self) -> Dict[str, Any]:
-        """Analyze import usage and dependencies."""
+    def _scan_app_tree(self) -> Dict[str, Any]:
+        """Read and parse every app module once for the in-process analyses.
+        
+        The import and file size analyses share this scan, so each file is
+        read and parsed a single time no matter which of them runs first.
+        """
+        if self._app_tree_scan is not None:
+            return self._app_tree_scan
+        
         import ast
         from collections import defaultdict
         
         imports = defaultdict(list)
-        unused_imports = []
+        line_counts = {}
         
-        for py_file in self.app_dir.rglob("*.py"):
+        for py_file in iter_py_files(self.app_dir):
             try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    tree = ast.parse(f.read())
-                
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Import):
-                        for alias in node.names:
-                            imports[alias.name].append(str(py_file))
-                    elif isinstance(node, ast.ImportFrom):
-                        module = node.module or ""
-                        for alias in node.names:
-                            full_name = f"{module}.{alias.name}" if module else alias.name
-                            imports[full_name].append(str(py_file))
+                with open(py_file, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"Warning: Could not analyze {py_file}: {e}")
+                continue
+            
+            # Same count as len(readlines()): a final unterminated line counts
+            lines = data.count(b"\n")
+            if data and not data.endswith(b"\n"):
+                lines += 1
+            line_counts[py_file] = lines
             
-            except Exception as e:
+            try:
+                tree = ast.parse(data, filename=py_file)
+            except (SyntaxError, ValueError) as e:
                 print(f"Warning: Could not analyze {py_file}: {e}")
+                continue
+            
+            # Imports are statements, so only statement lists are descended;
+            # expression subtrees, which make up most of the AST, are skipped
+            stack = [tree]
+            while stack:
+                node = stack.pop()
+                for field in ("body", "orelse", "finalbody", "handlers", "cases"):
+                    children = getattr(node, field, None)
+                    if isinstance(children, list):
+                        stack.extend(children)
+                
+                if isinstance(node, ast.Import):
+                    for alias in node.names:
+                        imports[alias.name].append(py_file)
+                elif isinstance(node, ast.ImportFrom):
+                    module = node.module or ""
+                    for alias in node.names:
+                        full_name = f"{module}.{alias.name}" if module else alias.name
+                        imports[full_name].append(py_file)
+        
+        self._app_tree_scan = {"imports": imports, "line_counts": line_counts}
+        return self._app_tree_scan
+    
+    def analyze_imports(self) -> Dict[str, Any]:
+        """Analyze import usage and dependencies."""
+        imports = self._scan_app_tree()["imports"]
         
         result = {
             "total_imports": len(imports),
@@ -219,27 +401,16 @@ class CodeAnalyzer:
     
     def analyze_file_sizes(self) -> Dict[str, Any]:
         """Analyze file sizes and identify large files."""
-        large_files = []
-        total_lines = 0
+        line_counts = self._scan_app_tree()["line_counts"]
         
-        for py_file in self.app_dir.rglob("*.py"):
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    lines = len(f.readlines())
-                
-                total_lines += lines
-                
-                if lines > 500:  # Large file threshold
-                    large_files.append({
-                        "file": str(py_file),
-                        "lines": lines
-                    })
-            
-            except Exception as e:
-                print(f"Warning: Could not analyze {py_file}: {e}")
+        large_files = [
+            {"file": file_path, "lines": lines}
+            for file_path, lines in line_counts.items()
+            if lines > 500  # Large file threshold
+        ]
         
         result = {
-            "total_lines": total_lines,
+            "total_lines": sum(line_counts.values()),
             "large_files": sorted(large_files, key=lambda x: x["lines"], reverse=True),
             "success": True
         }
@@ -247,6 +418,20 @@ class CodeAnalyzer:
         self.results["file_sizes"] = result
         return result
     
+    def run_concurrently(self, tasks: List[Callable[[], Dict[str, Any]]]) -> None:
+        """Run independent analysis steps in parallel.
+        
+        Each step spends its time waiting on its own tool subprocess, so
+        threads are enough to overlap them.
+        """
+        if not tasks:
+            return
+        
+        max_workers = min(len(tasks), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for future in [executor.submit(task) for task in tasks]:
+                future.result()
+    
     def generate_report(self) -> None:
         """Generate comprehensive analysis report."""
         print("\n" + "="*80)
@@ -284,7 +469,9 @@ class CodeAnalyzer:
             if flake8_result["success"]:
                 print("✅ Linting: PASSED")
             else:
-                violations = len(flake8_result["stdout"].split("\n"))
+                # --count leaves the total on the last line of output
+                count_lines = flake8_result["stdout"].strip().splitlines()
+                violations = count_lines[-1] if count_lines else "unknown number of"
                 print(f"❌ Linting: {violations} violations found")
         
         # Type checking
@@ -402,6 +589,11 @@ def main():
         type=str, 
         help="Output report to JSON file"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Rerun every tool even if its inputs are unchanged"
+    )
     
     args = parser.parse_args()
     
@@ -409,26 +601,39 @@ def main():
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
     
-    analyzer = CodeAnalyzer(str(project_root))
+    analyzer = CodeAnalyzer(str(project_root), use_cache=not args.no_cache)
     
     print("🔍 Starting code quality analysis...")
     print(f"Project root: {project_root}")
     
     # Run analysis tools
-    analyzer.run_black(fix=args.fix)
-    analyzer.run_isort(fix=args.fix)
-    analyzer.run_autoflake(fix=args.fix)
-    analyzer.run_flake8()
-    analyzer.run_mypy()
-    
+    formatters = [
+        partial(analyzer.run_black, fix=args.fix),
+        partial(analyzer.run_isort, fix=args.fix),
+        partial(analyzer.run_autoflake, fix=args.fix),
+    ]
+    checkers = [
+        analyzer.run_flake8,
+        analyzer.run_mypy,
+        analyzer.run_complexity_analysis,
+    ]
     if not args.skip_security:
-        analyzer.run_bandit()
-        analyzer.run_safety()
+        checkers.extend([analyzer.run_bandit, analyzer.run_safety])
+    
+    if args.fix:
+        # Fixers rewrite files, so they run one at a time and finish before
+        # the read-only checkers look at the tree
+        for formatter in formatters:
+            formatter()
+        analyzer.run_concurrently(checkers)
+    else:
+        analyzer.run_concurrently(formatters + checkers)
     
-    analyzer.run_complexity_analysis()
     analyzer.analyze_imports()
     analyzer.analyze_file_sizes()
     
+    analyzer.save_cache()
+    
     # Generate report
     analyzer.generate_report()
     
@@ -1,15 +1,27 @@
 # Pytest configuration and fixtures for therapy-assistant-agent tests
 
-import asyncio
+import base64
+import functools
+import itertools
+import logging
+import numpy as np
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from unittest.mock import Mock, patch
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from unittest.mock import AsyncMock, create_autospec, patch
+import openai
+from openai.resources.chat import Completions
 import tempfile
 import os
-from typing import AsyncGenerator, Generator
+import shutil
+from datetime import timedelta
+from pathlib import Path
+from types import MappingProxyType, SimpleNamespace
 
 # Import the application components
 from app.main_auth_async import app as auth_app
@@ -20,78 +32,136 @@ from app.main_auth_async import (
     UserRole, 
     LicenseType, 
     get_async_db,
-    hash_password,
+    verify_password,
     create_access_token
 )
 from app.services.audio_analysis import AudioAnalysisService
+from app.services.sentiment_cache import SentimentCache
 
 
-# Test database URL
-TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
-TEST_SYNC_DATABASE_URL = "sqlite:///:memory:"
+# Test database URL; named shared-cache in-memory databases so every
+# connection sees the same schema instead of a fresh empty database
+TEST_DATABASE_URL = "sqlite+aiosqlite:///file:testdb{suffix}?mode=memory&cache=shared&uri=true"
+TEST_SYNC_DATABASE_URL = "sqlite:///file:testdb_sync{suffix}?mode=memory&cache=shared&uri=true"
+SQLITE_CONNECT_ARGS = {"check_same_thread": False}
 
+# Keep SQLAlchemy from building log records on every statement and checkout
+logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+logging.getLogger("sqlalchemy.pool").setLevel(logging.WARNING)
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
 
+def _enable_sqlite_savepoints(sync_engine) -> None:
+    """Have SQLite transactions start with an explicit BEGIN."""
+    # pysqlite/aiosqlite defer BEGIN until the first DML statement, so a
+    # leading SAVEPOINT would open (and its RELEASE commit) the outermost
+    # transaction; take transaction control away from the driver instead
+    @event.listens_for(sync_engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(sync_engine, "begin")
+    def emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
 
-@pytest.fixture(scope="session")
-async def async_engine():
+
+def _database_url(template: str, config) -> str:
+    """Give each pytest-xdist worker its own database name."""
+    worker_id = getattr(config, "workerinput", {}).get("workerid", "master")
+    return template.format(suffix=f"_{worker_id}")
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def async_engine(request):
     """Create test database engine."""
     engine = create_async_engine(
-        TEST_DATABASE_URL,
+        _database_url(TEST_DATABASE_URL, request.config),
         echo=False,
-        poolclass=None,
-        pool_pre_ping=True
+        poolclass=StaticPool,
+        connect_args=SQLITE_CONNECT_ARGS
     )
+    _enable_sqlite_savepoints(engine.sync_engine)
+    
     yield engine
     await engine.dispose()
 
 
-@pytest.fixture(scope="session")
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def async_session_factory(async_engine):
     """Create test database session factory."""
+    # Sessions bound to a connection that is already in a transaction only
+    # ever commit or roll back their own SAVEPOINT, never the outer one
     async_session = async_sessionmaker(
         bind=async_engine,
         class_=AsyncSession,
-        expire_on_commit=False
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint"
     )
     yield async_session
 
 
-@pytest.fixture(scope="function")
-async def async_db(async_engine, async_session_factory):
-    """Create test database session."""
-    # Create tables
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def init_database(async_engine):
+    """Create the test schema once for the whole session."""
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     
-    async with async_session_factory() as session:
+    yield
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def db_connection(async_engine, init_database):
+    """Open one connection per test module inside a never-committed transaction."""
+    conn = await async_engine.connect()
+    trans = await conn.begin()
+    
+    yield conn
+    
+    await trans.rollback()
+    await conn.close()
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def async_db(db_connection, async_session_factory):
+    """Create test database session rolled back after each test."""
+    # Each test runs inside its own SAVEPOINT on the module connection, so
+    # module-level fixture data survives while test changes are discarded
+    savepoint = await db_connection.begin_nested()
+    
+    async with async_session_factory(bind=db_connection) as session:
         yield session
-        await session.rollback()
     
-    # Drop tables
-    async with async_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+    await savepoint.rollback()
 
 
-@pytest.fixture(scope="function")
-def sync_db():
-    """Create synchronous test database session."""
-    engine = create_engine(TEST_SYNC_DATABASE_URL, echo=False)
+@pytest.fixture(scope="session")
+def sync_engine(request):
+    """Create synchronous test database engine with the schema in place."""
+    engine = create_engine(
+        _database_url(TEST_SYNC_DATABASE_URL, request.config),
+        echo=False,
+        poolclass=StaticPool,
+        connect_args=SQLITE_CONNECT_ARGS
+    )
+    _enable_sqlite_savepoints(engine)
     Base.metadata.create_all(bind=engine)
     
-    SessionLocal = sessionmaker(bind=engine)
-    session = SessionLocal()
+    yield engine
+    
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def sync_db(sync_engine):
+    """Create synchronous test database session rolled back after each test."""
+    conn = sync_engine.connect()
+    trans = conn.begin()
+    session = Session(bind=conn, join_transaction_mode="create_savepoint")
     
     yield session
     
     session.close()
-    Base.metadata.drop_all(bind=engine)
+    trans.rollback()
+    conn.close()
 
 
 @pytest.fixture(scope="function")
@@ -103,35 +173,150 @@ def override_get_async_db(async_db):
     return _override_get_async_db
 
 
+@pytest.fixture(scope="session")
+def _auth_test_client():
+    """Start the auth app once and share its client across the session."""
+    with TestClient(auth_app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def _web_test_client():
+    """Start the web app once and share its client across the session."""
+    with TestClient(web_app) as client:
+        yield client
+
+
 @pytest.fixture(scope="function")
-def auth_client(override_get_async_db):
+def auth_client(_auth_test_client, override_get_async_db):
     """Create test client for auth app."""
     auth_app.dependency_overrides[get_async_db] = override_get_async_db
     
-    with TestClient(auth_app) as client:
-        yield client
+    yield _auth_test_client
     
     auth_app.dependency_overrides.clear()
+    # Don't let a login in one test authenticate the next
+    _auth_test_client.cookies.clear()
 
 
 @pytest.fixture(scope="function")
-def web_client(override_get_async_db):
+def web_client(_web_test_client, override_get_async_db):
     """Create test client for web app."""
     web_app.dependency_overrides[get_async_db] = override_get_async_db
     
-    with TestClient(web_app) as client:
-        yield client
+    yield _web_test_client
     
     web_app.dependency_overrides.clear()
+    # Don't let a login in one test authenticate the next
+    _web_test_client.cookies.clear()
+
+
+def _async_client(app) -> AsyncClient:
+    """Create an httpx client that calls the app in-process on the running loop."""
+    # Mirror TestClient's redirect handling; lifespan is not run, which is
+    # fine because get_async_db is overridden with the test session
+    return AsyncClient(
+        transport=ASGITransport(app=app),
+        base_url="http://test",
+        follow_redirects=True
+    )
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def _async_auth_http_client():
+    """Share one in-process async client for the auth app across the session."""
+    async with _async_client(auth_app) as client:
+        yield client
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def _async_web_http_client():
+    """Share one in-process async client for the web app across the session."""
+    async with _async_client(web_app) as client:
+        yield client
 
 
 @pytest.fixture(scope="function")
-async def test_user(async_db):
-    """Create a test user."""
-    user = User(
+def async_auth_client(_async_auth_http_client, override_get_async_db):
+    """Create async test client for auth app."""
+    auth_app.dependency_overrides[get_async_db] = override_get_async_db
+    
+    yield _async_auth_http_client
+    
+    auth_app.dependency_overrides.clear()
+    # Don't let a login in one test authenticate the next
+    _async_auth_http_client.cookies.clear()
+
+
+@pytest.fixture(scope="function")
+def async_web_client(_async_web_http_client, override_get_async_db):
+    """Create async test client for web app."""
+    web_app.dependency_overrides[get_async_db] = override_get_async_db
+    
+    yield _async_web_http_client
+    
+    web_app.dependency_overrides.clear()
+    # Don't let a login in one test authenticate the next
+    _async_web_http_client.cookies.clear()
+
+
+# Hashes are meaningless in tests, so skip bcrypt for everything the apps
+# hash while the suite runs
+FAST_HASH_PREFIX = "test$"
+
+
+def _fast_hash_password(password: str) -> str:
+    """Stand-in for hash_password that does no key stretching."""
+    return f"{FAST_HASH_PREFIX}{password}"
+
+
+def _fast_verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Stand-in for verify_password that also accepts real bcrypt hashes."""
+    # Tests may still build users with the real hash_password they import
+    if hashed_password and hashed_password.startswith(FAST_HASH_PREFIX):
+        return hashed_password == _fast_hash_password(plain_password)
+    return verify_password(plain_password, hashed_password)
+
+
+@pytest.fixture(scope="session")
+def canned_hashes():
+    """Password hashes for the passwords tests create users with, built once."""
+    passwords = [
+        "password123",
+        "testpass123",
+        "AdminPass123!",
+        "TherapistPass123!",
+        "StudentPass123!",
+        "NewPassword123!",
+    ]
+    return MappingProxyType({password: _fast_hash_password(password) for password in passwords})
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _fast_password_hashing():
+    """Patch the apps' password hashing with the fast stand-ins."""
+    with patch("app.main_auth_async.hash_password", _fast_hash_password), \
+         patch("app.main_auth_async.verify_password", _fast_verify_password), \
+         patch("app.main_web.verify_password", _fast_verify_password):
+        yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _no_sentiment_embeddings():
+    """Keep the sentiment cache from loading an embedding model in tests."""
+    # Tests that exercise the semantic tier pass their own embed function;
+    # the API lifespan preloads the model through its own import
+    with patch("app.services.sentiment_cache.load_embedding_model", return_value=None), \
+         patch("app.main_auth_async.load_embedding_model", return_value=None):
+        yield
+
+
+# Shared test users by role key; passwords are hashed when seeded
+USER_SPECS = {
+    "therapist": dict(
         email="test@example.com",
         username="testuser",
-        hashed_password=hash_password("testpass123"),
+        password="testpass123",
         first_name="Test",
         last_name="User",
         role=UserRole.THERAPIST,
@@ -140,49 +325,98 @@ async def test_user(async_db):
         license_state="CA",
         is_active=True,
         is_verified=True
-    )
-    
-    async_db.add(user)
-    await async_db.commit()
-    await async_db.refresh(user)
-    
-    yield user
-
-
-@pytest.fixture(scope="function")
-async def test_admin_user(async_db):
-    """Create a test admin user."""
-    user = User(
+    ),
+    "admin": dict(
         email="admin@example.com",
         username="adminuser",
-        hashed_password=hash_password("adminpass123"),
+        password="adminpass123",
         first_name="Admin",
         last_name="User",
         role=UserRole.ADMIN,
         is_active=True,
         is_verified=True
-    )
-    
-    async_db.add(user)
-    await async_db.commit()
-    await async_db.refresh(user)
-    
-    yield user
-
-
-@pytest.fixture(scope="function")
-async def test_student_user(async_db):
-    """Create a test student user."""
-    user = User(
+    ),
+    "student": dict(
         email="student@example.com",
         username="studentuser",
-        hashed_password=hash_password("studentpass123"),
+        password="studentpass123",
         first_name="Student",
         last_name="User",
         role=UserRole.STUDENT,
         license_type=LicenseType.STUDENT,
         is_active=True,
         is_verified=True
+    ),
+}
+
+
+def _build_user(spec: dict) -> User:
+    """Build a User from a USER_SPECS entry."""
+    fields = dict(spec)
+    fields["hashed_password"] = _fast_hash_password(fields.pop("password"))
+    return User(**fields)
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="session")
+async def seed_users(db_connection, async_session_factory):
+    """Create the shared test users for a module in one transaction."""
+    users = {key: _build_user(spec) for key, spec in USER_SPECS.items()}
+    
+    async with async_session_factory(bind=db_connection) as session:
+        session.add_all(users.values())
+        await session.commit()
+        
+        # Load server-generated columns for all users in one query rather
+        # than refreshing each one
+        await session.execute(
+            select(User).where(User.id.in_([user.id for user in users.values()]))
+        )
+    
+    yield users
+
+
+@pytest.fixture(scope="module")
+def user(request, seed_users):
+    """Shared test user for the USER_SPECS key given via indirect parametrize.
+    
+    Usage: @pytest.mark.parametrize("user", ["admin"], indirect=True)
+    """
+    return seed_users[request.param]
+
+
+@pytest.fixture(scope="module")
+def test_user(seed_users):
+    """Test user with the therapist role, shared by the module."""
+    return seed_users["therapist"]
+
+
+@pytest.fixture(scope="module")
+def test_admin_user(seed_users):
+    """Test admin user, shared by the module."""
+    return seed_users["admin"]
+
+
+@pytest.fixture(scope="module")
+def test_student_user(seed_users):
+    """Test student user, shared by the module."""
+    return seed_users["student"]
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def fresh_user(async_db):
+    """Create a user owned by a single test, for tests that modify it."""
+    user = User(
+        email="fresh@example.com",
+        username="freshuser",
+        hashed_password=_fast_hash_password("freshpass123"),
+        first_name="Fresh",
+        last_name="User",
+        role=UserRole.THERAPIST,
+        license_type=LicenseType.LMFT,
+        license_number="FRESH123456",
+        license_state="CA",
+        is_active=True,
+        is_verified=True
     )
     
     async_db.add(user)
@@ -192,75 +426,116 @@ async def test_student_user(async_db):
     yield user
 
 
-@pytest.fixture(scope="function")
+# Cached tokens must outlive a long test run, unlike the app's 30 minute default
+SESSION_TOKEN_LIFETIME = timedelta(hours=1)
+
+
+@functools.lru_cache(maxsize=None)
+def _token_for(email: str) -> str:
+    """Sign one access token per email for the whole session."""
+    return create_access_token(data={"sub": email}, expires_delta=SESSION_TOKEN_LIFETIME)
+
+
+@pytest.fixture(scope="module")
 def test_token(test_user):
     """Create a test JWT token."""
-    token = create_access_token(data={"sub": test_user.email})
-    return token
+    return _token_for(test_user.email)
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def admin_token(test_admin_user):
     """Create a test admin JWT token."""
-    token = create_access_token(data={"sub": test_admin_user.email})
-    return token
+    return _token_for(test_admin_user.email)
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def student_token(test_student_user):
     """Create a test student JWT token."""
-    token = create_access_token(data={"sub": test_student_user.email})
-    return token
+    return _token_for(test_student_user.email)
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def auth_headers(test_token):
     """Create authorization headers for testing."""
     return {"Authorization": f"Bearer {test_token}"}
 
 
 @pytest.fixture(scope="function")
+def fresh_auth_headers(test_user):
+    """Authorization headers with a newly signed, default-lifetime token."""
+    token = create_access_token(data={"sub": test_user.email})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="module")
 def admin_headers(admin_token):
     """Create admin authorization headers for testing."""
     return {"Authorization": f"Bearer {admin_token}"}
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="module")
 def student_headers(student_token):
     """Create student authorization headers for testing."""
     return {"Authorization": f"Bearer {student_token}"}
 
 
+# Canned collaborator results, built once at import instead of per test
+MOCK_TRANSCRIPTION = "This is test audio transcription"
+
+
+def _frozen_array(values, dtype=np.float32) -> np.ndarray:
+    """Build a read-only array for a canned librosa result."""
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+
+MOCK_LIBROSA_RESULTS = {
+    "load": (_frozen_array([0.1, 0.2, 0.3]), 22050),
+    "resample": _frozen_array([0.1, 0.2, 0.3]),
+    "piptrack": (_frozen_array([[100, 200, 300]]), _frozen_array([[0.5, 0.8, 0.6]])),
+    "feature.rms": _frozen_array([[0.1, 0.2, 0.15]]),
+    "feature.spectral_centroid": _frozen_array([[1000, 1500, 1200]]),
+    "feature.zero_crossing_rate": _frozen_array([[0.01, 0.02, 0.015]]),
+    "beat.beat_track": (120, _frozen_array([1, 2, 3], dtype=np.int64)),
+}
+
+
+def _chat_completion(content: str, prompt_tokens: int, completion_tokens: int) -> SimpleNamespace:
+    """Build a plain stand-in for an OpenAI chat completion response."""
+    # Plain namespaces avoid building a Mock attribute chain per test; each
+    # test still gets its own object, so tests may modify it freely
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    )
+
+
+# Spec'd once at import so each test only resets call state; the spec also
+# rejects calls that drift from the real client API. The client's `chat`
+# is a cached_property that autospec cannot follow, so the spec'd
+# completions resource is attached by hand
+MOCK_OPENAI_COMPLETIONS = create_autospec(Completions, instance=True)
+MOCK_OPENAI_CLIENT = create_autospec(openai.OpenAI, instance=True)
+MOCK_OPENAI_CLIENT.chat = SimpleNamespace(completions=MOCK_OPENAI_COMPLETIONS)
+
+
 @pytest.fixture(scope="function")
 def mock_openai_client():
     """Mock OpenAI client for testing."""
-    with patch('app.services.audio_analysis.openai.OpenAI') as mock_openai:
-        mock_client = Mock()
-        mock_openai.return_value = mock_client
-        
-        # Mock chat completions
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message = Mock()
-        mock_response.choices[0].message.content = "positive"
-        mock_response.usage = Mock()
-        mock_response.usage.prompt_tokens = 10
-        mock_response.usage.completion_tokens = 5
-        
-        mock_client.chat.completions.create.return_value = mock_response
-        
-        yield mock_client
+    MOCK_OPENAI_COMPLETIONS.reset_mock(return_value=True, side_effect=True)
+    MOCK_OPENAI_COMPLETIONS.create.return_value = _chat_completion("positive", 10, 5)
+    
+    with patch('app.services.audio_analysis.openai.OpenAI', return_value=MOCK_OPENAI_CLIENT):
+        yield MOCK_OPENAI_CLIENT
 
 
 @pytest.fixture(scope="function")
 def mock_speech_recognizer():
     """Mock speech recognition for testing."""
     with patch('app.services.audio_analysis.sr.Recognizer') as mock_recognizer:
-        mock_instance = Mock()
-        mock_recognizer.return_value = mock_instance
-        
-        mock_instance.recognize_google.return_value = "This is test audio transcription"
-        mock_instance.record.return_value = Mock()
+        mock_instance = mock_recognizer.return_value
+        mock_instance.recognize_google.return_value = MOCK_TRANSCRIPTION
         
         yield mock_instance
 
@@ -269,85 +544,115 @@ def mock_speech_recognizer():
 def mock_librosa():
     """Mock librosa for audio analysis testing."""
     with patch('app.services.audio_analysis.librosa') as mock_lib:
-        # Mock librosa functions
-        mock_lib.load.return_value = ([0.1, 0.2, 0.3], 22050)
-        mock_lib.piptrack.return_value = ([[100, 200, 300]], [[0.5, 0.8, 0.6]])
-        mock_lib.feature.rms.return_value = [[0.1, 0.2, 0.15]]
-        mock_lib.feature.spectral_centroid.return_value = [[1000, 1500, 1200]]
-        mock_lib.feature.zero_crossing_rate.return_value = [[0.01, 0.02, 0.015]]
-        mock_lib.beat.beat_track.return_value = (120, [1, 2, 3])
+        mock_lib.configure_mock(**{
+            f"{name}.return_value": value for name, value in MOCK_LIBROSA_RESULTS.items()
+        })
         
         yield mock_lib
 
 
-@pytest.fixture(scope="function")
+# A minimal WAV file header + some sample data, encoded once at import
+SAMPLE_AUDIO_B64 = base64.b64encode(
+    b'\x52\x49\x46\x46\x24\x00\x00\x00\x57\x41\x56\x45\x66\x6D\x74\x20\x10\x00\x00\x00\x01\x00\x01\x00\x40\x1F\x00\x00\x40\x1F\x00\x00\x01\x00\x08\x00\x64\x61\x74\x61\x00\x00\x00\x00'
+).decode('ascii')
+
+# Sample payloads are shared by every test, so expose them read-only
+SAMPLE_DIAGNOSTIC_DATA = MappingProxyType({
+    "symptoms": "Patient reports feeling sad and anxious for the past two weeks",
+    "patient_context": "29-year-old teacher, no previous mental health history"
+})
+
+SAMPLE_TREATMENT_DATA = MappingProxyType({
+    "diagnosis": "Major Depressive Disorder",
+    "patient_context": "Patient responds well to CBT approaches"
+})
+
+SAMPLE_VOICE_ANALYSIS_DATA = MappingProxyType({
+    "transcription": "I have been feeling really down lately",
+    "sentiment": "negative",
+    "emotion": "sad",
+    "tone": "depressed",
+    "speech_rate": 120.5,
+    "pause_frequency": 8.2,
+    "confidence": 0.85
+})
+
+
+@pytest.fixture(scope="session")
 def sample_audio_data():
     """Sample base64 encoded audio data for testing."""
-    # This is a minimal WAV file header + some sample data
-    import base64
-    
-    # Create a simple WAV file in memory
-    sample_data = b'\x52\x49\x46\x46\x24\x00\x00\x00\x57\x41\x56\x45\x66\x6D\x74\x20\x10\x00\x00\x00\x01\x00\x01\x00\x40\x1F\x00\x00\x40\x1F\x00\x00\x01\x00\x08\x00\x64\x61\x74\x61\x00\x00\x00\x00'
-    
-    return base64.b64encode(sample_data).decode('utf-8')
+    return SAMPLE_AUDIO_B64
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def sample_diagnostic_data():
     """Sample diagnostic data for testing."""
-    return {
-        "symptoms": "Patient reports feeling sad and anxious for the past two weeks",
-        "patient_context": "29-year-old teacher, no previous mental health history"
-    }
+    return SAMPLE_DIAGNOSTIC_DATA
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def sample_treatment_data():
     """Sample treatment data for testing."""
-    return {
-        "diagnosis": "Major Depressive Disorder",
-        "patient_context": "Patient responds well to CBT approaches"
-    }
+    return SAMPLE_TREATMENT_DATA
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def sample_voice_analysis_data():
     """Sample voice analysis data for testing."""
-    return {
-        "transcription": "I have been feeling really down lately",
-        "sentiment": "negative",
-        "emotion": "sad",
-        "tone": "depressed",
-        "speech_rate": 120.5,
-        "pause_frequency": 8.2,
-        "confidence": 0.85
-    }
+    return SAMPLE_VOICE_ANALYSIS_DATA
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture(scope="session")
 def audio_analysis_service():
-    """Create AudioAnalysisService instance for testing."""
+    """Create one AudioAnalysisService instance for the test session."""
     return AudioAnalysisService()
 
 
 @pytest.fixture(scope="function")
-def temp_file():
+def mocked_audio_service(audio_analysis_service, mock_librosa, mock_speech_recognizer,
+                         mock_openai_client, monkeypatch):
+    """Shared AudioAnalysisService with its collaborators mocked for one test."""
+    # librosa is a module global, already patched by mock_librosa; the
+    # service's own collaborators are swapped and restored by monkeypatch
+    monkeypatch.setattr(audio_analysis_service, "recognizer", mock_speech_recognizer)
+    monkeypatch.setattr(audio_analysis_service, "openai_client", mock_openai_client)
+    monkeypatch.setattr(audio_analysis_service, "sentiment_cache", SentimentCache())
+    
+    return audio_analysis_service
+
+
+@pytest.fixture(scope="session")
+def temp_dir(tmp_path_factory):
+    """Session-wide directory for temporary test files."""
+    # Prefer the RAM-backed /dev/shm so temp files never touch disk
+    if os.path.isdir("/dev/shm"):
+        path = Path(tempfile.mkdtemp(prefix="therapy-assistant-tests-", dir="/dev/shm"))
+        yield path
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        yield tmp_path_factory.mktemp("temp_files")
+
+
+_temp_file_ids = itertools.count()
+
+
+@pytest.fixture(scope="function")
+def temp_file(temp_dir):
     """Create a temporary file for testing."""
-    with tempfile.NamedTemporaryFile(mode='w+', delete=False) as f:
-        yield f.name
+    # Removed with the whole session directory rather than one by one
+    path = temp_dir / f"temp_{next(_temp_file_ids)}"
+    path.touch()
     
-    # Clean up
-    if os.path.exists(f.name):
-        os.unlink(f.name)
+    yield str(path)
 
 
 @pytest.fixture(scope="function")
-def mock_settings():
+def mock_settings(request):
     """Mock settings for testing."""
     with patch('app.core.config.settings') as mock_settings:
         mock_settings.OPENAI_API_KEY = "test-openai-key"
         mock_settings.SECRET_KEY = "test-secret-key"
-        mock_settings.DATABASE_URL = TEST_DATABASE_URL
+        mock_settings.DATABASE_URL = _database_url(TEST_DATABASE_URL, request.config)
         
         yield mock_settings
 
@@ -356,30 +661,34 @@ def mock_settings():
 def mock_async_openai_client():
     """Mock AsyncOpenAI client for testing."""
     with patch('app.main_auth_async.AsyncOpenAI') as mock_async_openai:
-        mock_client = Mock()
-        mock_async_openai.return_value = mock_client
+        mock_client = mock_async_openai.return_value
         
         # Mock async chat completions
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message = Mock()
-        mock_response.choices[0].message.content = "Test AI response for diagnostic analysis"
-        mock_response.usage = Mock()
-        mock_response.usage.prompt_tokens = 50
-        mock_response.usage.completion_tokens = 100
-        
-        async def mock_create(*args, **kwargs):
-            return mock_response
-        
-        mock_client.chat.completions.create = mock_create
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_chat_completion("Test AI response for diagnostic analysis", 50, 100)
+        )
         
         yield mock_client
 
 
 # Pytest markers for different test categories
-pytest.mark.unit = pytest.mark.unit
-pytest.mark.integration = pytest.mark.integration
-pytest.mark.slow = pytest.mark.slow
-pytest.mark.auth = pytest.mark.auth
-pytest.mark.voice = pytest.mark.voice
-pytest.mark.web = pytest.mark.web
\ No newline at end of file
+TEST_MARKERS = {
+    "unit": "Unit tests",
+    "integration": "Integration tests",
+    "slow": "Slow running tests",
+    "auth": "Authentication related tests",
+    "voice": "Voice analysis related tests",
+    "web": "Web interface related tests",
+    "database": "Database related tests",
+    "utilities": "Utility function tests",
+    "api": "API endpoint tests",
+    "security": "Security related tests",
+    "performance": "Performance tests",
+    "gpu": "Tests that need a CUDA device",
+}
+
+
+def pytest_configure(config):
+    """Register the suite's markers so --strict-markers accepts them."""
+    for name, description in TEST_MARKERS.items():
+        config.addinivalue_line("markers", f"{name}: {description}")
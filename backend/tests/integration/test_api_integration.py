@@ -1,28 +1,120 @@
 # Integration tests for API endpoints
 
 import pytest
-from fastapi.testclient import TestClient
-from unittest.mock import patch, Mock
-import json
+from unittest.mock import AsyncMock, MagicMock, patch
 import asyncio
+from datetime import timedelta
+
+import jwt.api_jwt
+from sqlalchemy import func, insert, select
 
 from app.main_auth_async import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
     User,
     UserRole,
     LicenseType,
-    hash_password,
-    create_access_token
+    app as auth_app,
+    get_current_user
 )
 from app.services.audio_analysis import VoiceAnalysis
 
 
+# Users created by test_authentication_with_different_roles, one per role
+ROLE_USERS = [
+    {
+        "email": "roles-admin@example.com",
+        "username": "admin",
+        "role": UserRole.ADMIN,
+        "password": "AdminPass123!"
+    },
+    {
+        "email": "therapist@example.com",
+        "username": "therapist",
+        "role": UserRole.THERAPIST,
+        "license_type": LicenseType.LMFT,
+        "password": "TherapistPass123!"
+    },
+    {
+        "email": "roles-student@example.com",
+        "username": "student",
+        "role": UserRole.STUDENT,
+        "license_type": LicenseType.STUDENT,
+        "password": "StudentPass123!"
+    }
+]
+
+# Stand-in for load_synthetic_cases, shared by the cases page and API tests
+SYNTHETIC_CASES = [
+    {
+        "id": "case1",
+        "disorder": "Depression",
+        "symptoms": ["low mood", "fatigue", "loss of interest"],
+        "demographics": {"age": 25, "gender": "female"}
+    },
+    {
+        "id": "case2",
+        "disorder": "Anxiety",
+        "symptoms": ["worry", "restlessness", "panic attacks"],
+        "demographics": {"age": 32, "gender": "male"}
+    }
+]
+
+
+@pytest.fixture
+def mock_openai(monkeypatch):
+    """Replace the API's OpenAI client for one test."""
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock()
+    monkeypatch.setattr("app.main_auth_async.openai_client", client)
+    return client
+
+
+@pytest.fixture
+def mock_web_openai(monkeypatch):
+    """Replace the web interface's OpenAI client for one test."""
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock()
+    monkeypatch.setattr("app.main_web.openai_client", client)
+    return client
+
+
+def _reply(client, text):
+    """Make a mocked OpenAI client answer every completion with text."""
+    client.chat.completions.create.return_value.choices[0].message.content = text
+
+
+@pytest.fixture
+def mock_audio_service(monkeypatch):
+    """Replace the API's shared audio analysis service for one test."""
+    service = MagicMock()
+    service.transcribe_audio = AsyncMock()
+    service.analyze_voice_comprehensive = AsyncMock()
+    monkeypatch.setattr("app.main_auth_async.audio_analysis_service", service)
+    return service
+
+
+@pytest.fixture
+def api_current_user(test_user):
+    """Resolve the API's current user to test_user without a bearer token."""
+    auth_app.dependency_overrides[get_current_user] = lambda: test_user
+    yield test_user
+    auth_app.dependency_overrides.pop(get_current_user, None)
+
+
+@pytest.fixture
+def web_current_user(monkeypatch, test_user):
+    """Resolve the web interface's current user to test_user."""
+    monkeypatch.setattr("app.main_web.get_current_user_required", AsyncMock(return_value=test_user))
+    return test_user
+
+
 @pytest.mark.integration
 @pytest.mark.auth
 class TestAuthenticationFlow:
     """Integration tests for authentication flow."""
     
     @pytest.mark.asyncio
-    async def test_complete_registration_and_login_flow(self, auth_client, async_db):
+    async def test_complete_registration_and_login_flow(self, async_auth_client, async_db):
         """Test complete user registration and login flow."""
         # Step 1: Register new user
         registration_data = {
@@ -33,7 +125,7 @@ class TestAuthenticationFlow:
             "last_name": "User"
         }
         
-        response = auth_client.post("/api/auth/register", json=registration_data)
+        response = await async_auth_client.post("/api/auth/register", json=registration_data)
         assert response.status_code == 200
         
         registration_result = response.json()
@@ -46,7 +138,7 @@ class TestAuthenticationFlow:
             "password": "NewPassword123!"
         }
         
-        response = auth_client.post("/api/auth/login", json=login_data)
+        response = await async_auth_client.post("/api/auth/login", json=login_data)
         assert response.status_code == 200
         
         login_result = response.json()
@@ -55,89 +147,65 @@ class TestAuthenticationFlow:
         
         # Step 3: Access protected endpoint
         headers = {"Authorization": f"Bearer {login_result['access_token']}"}
-        response = auth_client.get("/api/auth/me", headers=headers)
+        response = await async_auth_client.get("/api/auth/me", headers=headers)
         assert response.status_code == 200
         
         user_info = response.json()
         assert user_info["email"] == "newuser@example.com"
     
     @pytest.mark.asyncio
-    async def test_authentication_with_different_roles(self, auth_client, async_db):
+    @pytest.mark.parametrize("user_data", ROLE_USERS, ids=lambda user_data: user_data["role"].value)
+    async def test_authentication_with_different_roles(self, async_auth_client, async_db, canned_hashes, user_data):
         """Test authentication with different user roles."""
-        # Create users with different roles
-        users = [
-            {
-                "email": "admin@example.com",
-                "username": "admin",
-                "role": UserRole.ADMIN,
-                "password": "AdminPass123!"
-            },
-            {
-                "email": "therapist@example.com",
-                "username": "therapist",
-                "role": UserRole.THERAPIST,
-                "license_type": LicenseType.LMFT,
-                "password": "TherapistPass123!"
-            },
-            {
-                "email": "student@example.com",
-                "username": "student",
-                "role": UserRole.STUDENT,
-                "license_type": LicenseType.STUDENT,
-                "password": "StudentPass123!"
-            }
-        ]
-        
-        for user_data in users:
-            # Create user directly in database
-            user = User(
-                email=user_data["email"],
-                username=user_data["username"],
-                hashed_password=hash_password(user_data["password"]),
-                first_name="Test",
-                last_name="User",
-                role=user_data["role"],
-                license_type=user_data.get("license_type", LicenseType.STUDENT),
-                is_active=True,
-                is_verified=True
-            )
-            
-            async_db.add(user)
-            await async_db.commit()
-            
-            # Test login
-            login_data = {
-                "username": user_data["email"],
-                "password": user_data["password"]
-            }
-            
-            response = auth_client.post("/api/auth/login", json=login_data)
-            assert response.status_code == 200
-            
-            result = response.json()
-            assert result["user"]["role"] == user_data["role"].value
+        # Create the user directly in database
+        async_db.add(User(
+            email=user_data["email"],
+            username=user_data["username"],
+            hashed_password=canned_hashes[user_data["password"]],
+            first_name="Test",
+            last_name="User",
+            role=user_data["role"],
+            license_type=user_data.get("license_type", LicenseType.STUDENT),
+            is_active=True,
+            is_verified=True
+        ))
+        await async_db.commit()
+        
+        # Test login
+        login_data = {
+            "username": user_data["email"],
+            "password": user_data["password"]
+        }
+        
+        response = await async_auth_client.post("/api/auth/login", json=login_data)
+        assert response.status_code == 200
+        
+        result = response.json()
+        assert result["user"]["role"] == user_data["role"].value
     
     @pytest.mark.asyncio
-    async def test_token_expiration_and_refresh_flow(self, auth_client, test_user):
+    async def test_token_expiration_and_refresh_flow(self, async_auth_client, test_user, fresh_auth_headers, monkeypatch):
         """Test token expiration and refresh flow."""
-        # Create short-lived token
-        short_token = create_access_token(
-            data={"sub": test_user.email},
-            expires_delta={"seconds": 1}
-        )
-        
-        # Token should work initially
-        headers = {"Authorization": f"Bearer {short_token}"}
-        response = auth_client.get("/api/auth/me", headers=headers)
+        # Newly signed token with the app's default lifetime should work initially
+        headers = fresh_auth_headers
+        response = await async_auth_client.get("/api/auth/me", headers=headers)
         assert response.status_code == 200
         
-        # Wait for token to expire
-        import time
-        time.sleep(2)
+        # Move the clock PyJWT validates against past the expiry instead of
+        # waiting for it
+        real_datetime = jwt.api_jwt.datetime
         
-        # Token should be expired
-        response = auth_client.get("/api/auth/me", headers=headers)
-        assert response.status_code == 401
+        class FutureDateTime(real_datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return real_datetime.now(tz) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES + 1)
+        
+        with monkeypatch.context() as m:
+            m.setattr(jwt.api_jwt, "datetime", FutureDateTime)
+            
+            # Token should be expired
+            response = await async_auth_client.get("/api/auth/me", headers=headers)
+            assert response.status_code == 401
         
         # Should be able to login again to get new token
         login_data = {
@@ -145,7 +213,7 @@ class TestAuthenticationFlow:
             "password": "testpass123"
         }
         
-        response = auth_client.post("/api/auth/login", json=login_data)
+        response = await async_auth_client.post("/api/auth/login", json=login_data)
         assert response.status_code == 200
         
         result = response.json()
@@ -153,7 +221,7 @@ class TestAuthenticationFlow:
         
         # New token should work
         new_headers = {"Authorization": f"Bearer {result['access_token']}"}
-        response = auth_client.get("/api/auth/me", headers=new_headers)
+        response = await async_auth_client.get("/api/auth/me", headers=new_headers)
         assert response.status_code == 200
 
 
@@ -163,7 +231,7 @@ class TestVoiceAnalysisFlow:
     """Integration tests for voice analysis flow."""
     
     @pytest.mark.asyncio
-    async def test_complete_voice_analysis_flow(self, auth_client, test_user, auth_headers, sample_audio_data):
+    async def test_complete_voice_analysis_flow(self, async_auth_client, api_current_user, sample_audio_data, mock_audio_service, mock_openai):
         """Test complete voice analysis flow."""
         # Mock the audio analysis service
         mock_analysis = VoiceAnalysis(
@@ -176,40 +244,36 @@ class TestVoiceAnalysisFlow:
             confidence=0.88
         )
         
-        with patch('app.main_auth_async.AudioAnalysisService') as mock_service:
-            mock_instance = mock_service.return_value
-            mock_instance.analyze_voice_comprehensive.return_value = mock_analysis
-            
-            # Step 1: Perform voice analysis
-            request_data = {"audio_data": sample_audio_data}
-            response = auth_client.post("/voice/analyze", json=request_data, headers=auth_headers)
-            assert response.status_code == 200
-            
-            result = response.json()
-            assert result["transcription"] == "I have been feeling very anxious lately"
-            assert result["sentiment"] == "negative"
-            assert result["emotion"] == "anxious"
-            assert result["tone"] == "anxious"
-            assert result["speech_rate"] == 140.0
-            assert result["pause_frequency"] == 12.0
-            assert result["confidence"] == 0.88
-            
-            # Step 2: Use transcription for diagnostic assistance
-            diagnostic_params = f"symptoms={result['transcription']}"
-            
-            with patch('app.main_auth_async.openai_client') as mock_openai:
-                mock_openai.chat.completions.create.return_value.choices[0].message.content = \
-                    "Based on the symptoms described, this may indicate anxiety disorder."
-                
-                response = auth_client.get(f"/api/v1/rag/diagnose?{diagnostic_params}")
-                assert response.status_code == 200
-                
-                diagnostic_result = response.json()
-                assert diagnostic_result["status"] == "success"
-                assert "anxiety" in diagnostic_result["ai_response"].lower()
+        mock_audio_service.analyze_voice_comprehensive.return_value = mock_analysis
+        
+        # Step 1: Perform voice analysis
+        request_data = {"audio_data": sample_audio_data}
+        response = await async_auth_client.post("/voice/analyze", json=request_data)
+        assert response.status_code == 200
+        
+        result = response.json()
+        assert result["transcription"] == "I have been feeling very anxious lately"
+        assert result["sentiment"] == "negative"
+        assert result["emotion"] == "anxious"
+        assert result["tone"] == "anxious"
+        assert result["speech_rate"] == 140.0
+        assert result["pause_frequency"] == 12.0
+        assert result["confidence"] == 0.88
+        
+        # Step 2: Use transcription for diagnostic assistance
+        diagnostic_params = {"symptoms": result["transcription"]}
+        
+        _reply(mock_openai, "Based on the symptoms described, this may indicate anxiety disorder.")
+        
+        response = await async_auth_client.get("/api/v1/rag/diagnose", params=diagnostic_params)
+        assert response.status_code == 200
+        
+        diagnostic_result = response.json()
+        assert diagnostic_result["status"] == "success"
+        assert "anxiety" in diagnostic_result["ai_response"].lower()
     
     @pytest.mark.asyncio
-    async def test_voice_analysis_with_treatment_recommendations(self, auth_client, test_user, auth_headers, sample_audio_data):
+    async def test_voice_analysis_with_treatment_recommendations(self, async_auth_client, api_current_user, sample_audio_data, mock_audio_service, mock_openai):
         """Test voice analysis integrated with treatment recommendations."""
         # Mock voice analysis
         mock_analysis = VoiceAnalysis(
@@ -222,54 +286,47 @@ class TestVoiceAnalysisFlow:
             confidence=0.85
         )
         
-        with patch('app.main_auth_async.AudioAnalysisService') as mock_service:
-            mock_instance = mock_service.return_value
-            mock_instance.analyze_voice_comprehensive.return_value = mock_analysis
-            
-            # Step 1: Analyze voice
-            request_data = {"audio_data": sample_audio_data}
-            response = auth_client.post("/voice/analyze", json=request_data, headers=auth_headers)
-            assert response.status_code == 200
-            
-            voice_result = response.json()
-            
-            # Step 2: Get diagnostic suggestions
-            with patch('app.main_auth_async.openai_client') as mock_openai:
-                mock_openai.chat.completions.create.return_value.choices[0].message.content = \
-                    "Major Depressive Disorder"
-                
-                diagnostic_params = f"symptoms={voice_result['transcription']}"
-                response = auth_client.get(f"/api/v1/rag/diagnose?{diagnostic_params}")
-                assert response.status_code == 200
-                
-                diagnostic_result = response.json()
-                
-                # Step 3: Get treatment recommendations
-                mock_openai.chat.completions.create.return_value.choices[0].message.content = \
-                    "Recommended treatment includes cognitive behavioral therapy and medication evaluation."
-                
-                treatment_params = f"diagnosis=Major Depressive Disorder"
-                response = auth_client.get(f"/api/v1/rag/treatment?{treatment_params}")
-                assert response.status_code == 200
-                
-                treatment_result = response.json()
-                assert treatment_result["status"] == "success"
-                assert "cognitive behavioral therapy" in treatment_result["ai_response"].lower()
+        mock_audio_service.analyze_voice_comprehensive.return_value = mock_analysis
+        
+        # Step 1: Analyze voice
+        request_data = {"audio_data": sample_audio_data}
+        response = await async_auth_client.post("/voice/analyze", json=request_data)
+        assert response.status_code == 200
+        
+        voice_result = response.json()
+        
+        # Step 2: Get diagnostic suggestions
+        _reply(mock_openai, "Major Depressive Disorder")
+        
+        diagnostic_params = {"symptoms": voice_result["transcription"]}
+        response = await async_auth_client.get("/api/v1/rag/diagnose", params=diagnostic_params)
+        assert response.status_code == 200
+        
+        diagnostic_result = response.json()
+        
+        # Step 3: Get treatment recommendations
+        _reply(mock_openai, "Recommended treatment includes cognitive behavioral therapy and medication evaluation.")
+        
+        treatment_params = {"diagnosis": "Major Depressive Disorder"}
+        response = await async_auth_client.get("/api/v1/rag/treatment", params=treatment_params)
+        assert response.status_code == 200
+        
+        treatment_result = response.json()
+        assert treatment_result["status"] == "success"
+        assert "cognitive behavioral therapy" in treatment_result["ai_response"].lower()
     
     @pytest.mark.asyncio
-    async def test_voice_analysis_error_handling(self, auth_client, test_user, auth_headers, sample_audio_data):
+    async def test_voice_analysis_error_handling(self, async_auth_client, api_current_user, sample_audio_data, mock_audio_service):
         """Test voice analysis error handling."""
         # Test with audio analysis service failure
-        with patch('app.main_auth_async.AudioAnalysisService') as mock_service:
-            mock_instance = mock_service.return_value
-            mock_instance.analyze_voice_comprehensive.side_effect = Exception("Audio processing failed")
-            
-            request_data = {"audio_data": sample_audio_data}
-            response = auth_client.post("/voice/analyze", json=request_data, headers=auth_headers)
-            assert response.status_code == 500
-            
-            # Should handle gracefully
-            assert "error" in response.json()["detail"].lower()
+        mock_audio_service.analyze_voice_comprehensive.side_effect = Exception("Audio processing failed")
+        
+        request_data = {"audio_data": sample_audio_data}
+        response = await async_auth_client.post("/voice/analyze", json=request_data)
+        assert response.status_code == 500
+        
+        # Should handle gracefully
+        assert "error" in response.json()["detail"].lower()
 
 
 @pytest.mark.integration
@@ -278,7 +335,7 @@ class TestWebIntegrationFlow:
     """Integration tests for web interface flow."""
     
     @pytest.mark.asyncio
-    async def test_complete_web_diagnostic_flow(self, web_client, test_user):
+    async def test_complete_web_diagnostic_flow(self, async_web_client, test_user, web_current_user, mock_web_openai):
         """Test complete web diagnostic flow."""
         # Step 1: Login via web interface
         login_data = {
@@ -286,7 +343,7 @@ class TestWebIntegrationFlow:
             "password": "testpass123"
         }
         
-        response = web_client.post("/login", data=login_data, follow_redirects=False)
+        response = await async_web_client.post("/login", data=login_data, follow_redirects=False)
         assert response.status_code == 302
         assert response.headers["location"] == "/dashboard"
         
@@ -295,84 +352,61 @@ class TestWebIntegrationFlow:
         assert token is not None
         
         # Step 2: Access dashboard
-        with patch('app.main_web.get_current_user_required', return_value=test_user):
-            response = web_client.get("/dashboard")
-            assert response.status_code == 200
-            
-            # Step 3: Access diagnostic page
-            response = web_client.get("/diagnostic")
-            assert response.status_code == 200
-            
-            # Step 4: Submit diagnostic form
-            with patch('app.main_web.openai_client') as mock_openai:
-                mock_openai.chat.completions.create.return_value.choices[0].message.content = \
-                    "Based on the symptoms, this suggests possible anxiety disorder."
-                
-                diagnostic_data = {
-                    "symptoms": "Patient reports persistent worry and restlessness",
-                    "patient_context": "30-year-old professional with no prior mental health history"
-                }
-                
-                response = web_client.post("/diagnostic", data=diagnostic_data)
-                assert response.status_code == 200
-                
-                # Should contain diagnostic results
-                assert "anxiety" in response.text.lower()
+        response = await async_web_client.get("/dashboard")
+        assert response.status_code == 200
+        
+        # Step 3: Access diagnostic page
+        response = await async_web_client.get("/diagnostic")
+        assert response.status_code == 200
+        
+        # Step 4: Submit diagnostic form
+        _reply(mock_web_openai, "Based on the symptoms, this suggests possible anxiety disorder.")
+        
+        diagnostic_data = {
+            "symptoms": "Patient reports persistent worry and restlessness",
+            "patient_context": "30-year-old professional with no prior mental health history"
+        }
+        
+        response = await async_web_client.post("/diagnostic", data=diagnostic_data)
+        assert response.status_code == 200
+        
+        # Should contain diagnostic results
+        assert "anxiety" in response.text.lower()
     
     @pytest.mark.asyncio
-    async def test_web_treatment_flow(self, web_client, test_user):
+    async def test_web_treatment_flow(self, async_web_client, test_user, web_current_user, mock_web_openai):
         """Test web treatment recommendation flow."""
-        with patch('app.main_web.get_current_user_required', return_value=test_user):
-            # Step 1: Access treatment page
-            response = web_client.get("/treatment")
-            assert response.status_code == 200
-            
-            # Step 2: Submit treatment form
-            with patch('app.main_web.openai_client') as mock_openai:
-                mock_openai.chat.completions.create.return_value.choices[0].message.content = \
-                    "Recommended treatment includes CBT and medication evaluation."
-                
-                treatment_data = {
-                    "diagnosis": "Major Depressive Disorder",
-                    "patient_context": "Patient responds well to structured interventions"
-                }
-                
-                response = web_client.post("/treatment", data=treatment_data)
-                assert response.status_code == 200
-                
-                # Should contain treatment recommendations
-                assert "cbt" in response.text.lower() or "cognitive" in response.text.lower()
+        # Step 1: Access treatment page
+        response = await async_web_client.get("/treatment")
+        assert response.status_code == 200
+        
+        # Step 2: Submit treatment form
+        _reply(mock_web_openai, "Recommended treatment includes CBT and medication evaluation.")
+        
+        treatment_data = {
+            "diagnosis": "Major Depressive Disorder",
+            "patient_context": "Patient responds well to structured interventions"
+        }
+        
+        response = await async_web_client.post("/treatment", data=treatment_data)
+        assert response.status_code == 200
+        
+        # Should contain treatment recommendations
+        assert "cbt" in response.text.lower() or "cognitive" in response.text.lower()
     
     @pytest.mark.asyncio
-    async def test_web_cases_page_flow(self, web_client, test_user):
+    async def test_web_cases_page_flow(self, async_web_client, test_user, web_current_user):
         """Test web cases page flow."""
-        with patch('app.main_web.get_current_user_required', return_value=test_user):
-            # Mock synthetic cases
-            mock_cases = [
-                {
-                    "id": "case1",
-                    "disorder": "Depression",
-                    "symptoms": ["low mood", "fatigue", "loss of interest"],
-                    "demographics": {"age": 25, "gender": "female"}
-                },
-                {
-                    "id": "case2",
-                    "disorder": "Anxiety",
-                    "symptoms": ["worry", "restlessness", "panic attacks"],
-                    "demographics": {"age": 32, "gender": "male"}
-                }
-            ]
+        with patch('app.services.async_file_service.load_synthetic_cases', return_value=SYNTHETIC_CASES):
+            response = await async_web_client.get("/cases")
+            assert response.status_code == 200
             
-            with patch('app.services.async_file_service.load_synthetic_cases', return_value=mock_cases):
-                response = web_client.get("/cases")
-                assert response.status_code == 200
-                
-                # Should display cases
-                assert "depression" in response.text.lower()
-                assert "anxiety" in response.text.lower()
+            # Should display cases
+            assert "depression" in response.text.lower()
+            assert "anxiety" in response.text.lower()
     
     @pytest.mark.asyncio
-    async def test_web_logout_flow(self, web_client, test_user):
+    async def test_web_logout_flow(self, async_web_client, test_user):
         """Test web logout flow."""
         # Login first
         login_data = {
@@ -380,11 +414,11 @@ class TestWebIntegrationFlow:
             "password": "testpass123"
         }
         
-        response = web_client.post("/login", data=login_data, follow_redirects=False)
+        response = await async_web_client.post("/login", data=login_data, follow_redirects=False)
         assert response.status_code == 302
         
         # Logout
-        response = web_client.get("/logout", follow_redirects=False)
+        response = await async_web_client.get("/logout", follow_redirects=False)
         assert response.status_code == 302
         assert response.headers["location"] == "/login"
         
@@ -399,32 +433,30 @@ class TestDatabaseIntegration:
     """Integration tests for database operations."""
     
     @pytest.mark.asyncio
-    async def test_user_crud_operations(self, async_db):
+    async def test_user_crud_operations(self, async_db, canned_hashes):
         """Test complete user CRUD operations."""
-        # Create
-        user = User(
-            email="crud@example.com",
-            username="cruduser",
-            hashed_password=hash_password("password123"),
-            first_name="CRUD",
-            last_name="User",
-            role=UserRole.THERAPIST,
-            license_type=LicenseType.LMFT,
-            license_number="CRUD123456",
-            license_state="CA",
-            is_active=True,
-            is_verified=True
+        # Create; RETURNING hands back the generated id without a refresh
+        result = await async_db.execute(
+            insert(User).values(
+                email="crud@example.com",
+                username="cruduser",
+                hashed_password=canned_hashes["password123"],
+                first_name="CRUD",
+                last_name="User",
+                role=UserRole.THERAPIST,
+                license_type=LicenseType.LMFT,
+                license_number="CRUD123456",
+                license_state="CA",
+                is_active=True,
+                is_verified=True
+            ).returning(User.id)
         )
-        
-        async_db.add(user)
+        created_user_id = result.scalar_one()
         await async_db.commit()
-        await async_db.refresh(user)
         
-        assert user.id is not None
-        created_user_id = user.id
+        assert created_user_id is not None
         
         # Read
-        from sqlalchemy import select
         result = await async_db.execute(
             select(User).where(User.id == created_user_id)
         )
@@ -453,14 +485,15 @@ class TestDatabaseIntegration:
         assert deleted_user is None
     
     @pytest.mark.asyncio
-    async def test_user_relationship_queries(self, async_db):
+    async def test_user_relationship_queries(self, async_db, canned_hashes):
         """Test user relationship queries."""
-        # Create multiple users with different roles
-        users = [
-            User(
+        # Create multiple users with different roles in one bulk INSERT
+        hashed_password = canned_hashes["password123"]
+        await async_db.execute(insert(User), [
+            dict(
                 email=f"user{i}@example.com",
                 username=f"user{i}",
-                hashed_password=hash_password("password123"),
+                hashed_password=hashed_password,
                 first_name=f"User{i}",
                 last_name="Test",
                 role=UserRole.THERAPIST if i % 2 == 0 else UserRole.STUDENT,
@@ -468,36 +501,25 @@ class TestDatabaseIntegration:
                 is_active=True,
                 is_verified=True
             ) for i in range(5)
-        ]
-        
-        for user in users:
-            async_db.add(user)
+        ])
         await async_db.commit()
         
-        # Query therapists
-        from sqlalchemy import select
-        result = await async_db.execute(
-            select(User).where(User.role == UserRole.THERAPIST)
-        )
-        therapists = result.scalars().all()
-        
-        assert len(therapists) == 3  # users 0, 2, 4
-        
-        # Query students
-        result = await async_db.execute(
-            select(User).where(User.role == UserRole.STUDENT)
-        )
-        students = result.scalars().all()
-        
-        assert len(students) == 2  # users 1, 3
+        # Only count the users created here; module-scoped fixture users
+        # may share the database
+        created = User.email.like("user%@example.com")
         
-        # Query by license type
+        # Count users per (role, license type) in one grouped query
         result = await async_db.execute(
-            select(User).where(User.license_type == LicenseType.LMFT)
+            select(User.role, User.license_type, func.count().label("count"))
+            .where(created)
+            .group_by(User.role, User.license_type)
         )
-        lmft_users = result.scalars().all()
+        counts = {(row.role, row.license_type): row.count for row in result}
         
-        assert len(lmft_users) == 3
+        assert counts == {
+            (UserRole.THERAPIST, LicenseType.LMFT): 3,  # users 0, 2, 4
+            (UserRole.STUDENT, LicenseType.STUDENT): 2  # users 1, 3
+        }
 
 
 @pytest.mark.integration
@@ -506,38 +528,34 @@ class TestAPIEndpointIntegration:
     """Integration tests for API endpoints."""
     
     @pytest.mark.asyncio
-    async def test_health_check_endpoints(self, auth_client):
+    async def test_health_check_endpoints(self, async_auth_client):
         """Test health check endpoints."""
+        # The two health checks are independent, so issue them together
+        auth_response, voice_response = await asyncio.gather(
+            async_auth_client.get("/health"),
+            async_auth_client.get("/voice/health")
+        )
+        
         # Auth API health check
-        response = auth_client.get("/health")
-        assert response.status_code == 200
+        assert auth_response.status_code == 200
         
-        data = response.json()
+        data = auth_response.json()
         assert data["status"] == "healthy"
         assert "database" in data
         assert "openai" in data
         
         # Voice API health check
-        response = auth_client.get("/voice/health")
-        assert response.status_code == 200
+        assert voice_response.status_code == 200
         
-        data = response.json()
+        data = voice_response.json()
         assert data["status"] == "healthy"
         assert "features" in data
     
     @pytest.mark.asyncio
-    async def test_synthetic_cases_endpoint(self, auth_client):
+    async def test_synthetic_cases_endpoint(self, async_auth_client):
         """Test synthetic cases endpoint."""
-        mock_cases = [
-            {
-                "id": "case1",
-                "disorder": "Depression",
-                "symptoms": ["sadness", "fatigue"]
-            }
-        ]
-        
-        with patch('app.services.async_file_service.load_synthetic_cases', return_value=mock_cases):
-            response = auth_client.get("/api/v1/synthetic-cases")
+        with patch('app.services.async_file_service.load_synthetic_cases', return_value=SYNTHETIC_CASES[:1]):
+            response = await async_auth_client.get("/api/v1/synthetic-cases")
             assert response.status_code == 200
             
             data = response.json()
@@ -546,38 +564,34 @@ class TestAPIEndpointIntegration:
             assert len(data["cases"]) == 1
     
     @pytest.mark.asyncio
-    async def test_rag_diagnostic_endpoint(self, auth_client):
+    async def test_rag_diagnostic_endpoint(self, async_auth_client, mock_openai):
         """Test RAG diagnostic endpoint."""
-        with patch('app.main_auth_async.openai_client') as mock_openai:
-            mock_openai.chat.completions.create.return_value.choices[0].message.content = \
-                "Based on the symptoms, this suggests possible depression."
-            
-            response = auth_client.get("/api/v1/rag/diagnose?symptoms=feeling+sad+and+tired")
-            assert response.status_code == 200
-            
-            data = response.json()
-            assert data["status"] == "success"
-            assert "ai_response" in data
-            assert "depression" in data["ai_response"].lower()
+        _reply(mock_openai, "Based on the symptoms, this suggests possible depression.")
+        
+        response = await async_auth_client.get("/api/v1/rag/diagnose", params={"symptoms": "feeling sad and tired"})
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["status"] == "success"
+        assert "ai_response" in data
+        assert "depression" in data["ai_response"].lower()
     
     @pytest.mark.asyncio
-    async def test_rag_treatment_endpoint(self, auth_client):
+    async def test_rag_treatment_endpoint(self, async_auth_client, mock_openai):
         """Test RAG treatment endpoint."""
-        with patch('app.main_auth_async.openai_client') as mock_openai:
-            mock_openai.chat.completions.create.return_value.choices[0].message.content = \
-                "Recommended treatment includes therapy and medication evaluation."
-            
-            response = auth_client.get("/api/v1/rag/treatment?diagnosis=Major+Depressive+Disorder")
-            assert response.status_code == 200
-            
-            data = response.json()
-            assert data["status"] == "success"
-            assert "ai_response" in data
-            assert "therapy" in data["ai_response"].lower()
+        _reply(mock_openai, "Recommended treatment includes therapy and medication evaluation.")
+        
+        response = await async_auth_client.get("/api/v1/rag/treatment", params={"diagnosis": "Major Depressive Disorder"})
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["status"] == "success"
+        assert "ai_response" in data
+        assert "therapy" in data["ai_response"].lower()
     
     @pytest.mark.asyncio
-    async def test_case_analysis_endpoint(self, auth_client):
+    async def test_case_analysis_endpoint(self, async_auth_client):
         """Test case analysis endpoint."""
         # Test with non-existent case
-        response = auth_client.get("/api/v1/case-analysis/NONEXISTENT")
+        response = await async_auth_client.get("/api/v1/case-analysis/NONEXISTENT")
         assert response.status_code == 404
\ No newline at end of file
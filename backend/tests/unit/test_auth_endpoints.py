@@ -6,8 +6,6 @@ from unittest.mock import patch, Mock
 import json
 
 from app.main_auth_async import (
-    User,
-    UserRole,
     LicenseType,
     hash_password,
     verify_password,
@@ -89,25 +87,15 @@ class TestAuthenticationEndpoints:
         assert "Incorrect email or password" in data["detail"]
     
     @pytest.mark.asyncio
-    async def test_login_inactive_user(self, auth_client, async_db):
+    async def test_login_inactive_user(self, auth_client, async_db, fresh_user):
         """Test login with inactive user."""
-        # Create inactive user
-        inactive_user = User(
-            email="inactive@example.com",
-            username="inactive",
-            hashed_password=hash_password("password123"),
-            first_name="Inactive",
-            last_name="User",
-            role=UserRole.THERAPIST,
-            is_active=False,
-            is_verified=True
-        )
-        async_db.add(inactive_user)
+        # Deactivate a user owned by this test, not the shared test_user
+        fresh_user.is_active = False
         await async_db.commit()
         
         login_data = {
-            "username": "inactive@example.com",
-            "password": "password123"
+            "username": fresh_user.email,
+            "password": "freshpass123"
         }
         
         response = auth_client.post("/api/auth/login", json=login_data)
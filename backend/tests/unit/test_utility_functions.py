@@ -7,6 +7,7 @@ import os
 import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
+from collections import deque
 import aiofiles
 import asyncio
 
@@ -690,6 +691,19 @@ class TestSecurityUtilities:
         assert result[2] == "another safe text"
         assert "<script>" not in result[1]
     
+    def test_sanitize_input_self_reference(self):
+        """Test sanitizing a self-referencing structure terminates and keeps its shape."""
+        from app.utils.security import sanitize_input
+        
+        input_dict = {"comment": " note\x00 ", "items": []}
+        input_dict["self"] = input_dict
+        input_dict["items"].append(input_dict["items"])
+        
+        result = sanitize_input(input_dict)
+        assert result["self"] is result
+        assert result["items"][0] is result["items"]
+        assert result["comment"] == "note"
+    
     def test_sanitize_filename(self):
         """Test filename sanitization."""
         from app.utils.security import SecurityManager
@@ -706,6 +720,13 @@ class TestSecurityUtilities:
         result = manager.sanitize_filename(dangerous_filename)
         assert "../" not in result
         assert "passwd" in result  # Should keep the actual filename part
+        
+        # Sequences left behind by removing another one are removed as well
+        for nested in ("..../\\", "....//", "..\\../report.txt", ".../...//passwd"):
+            result = manager.sanitize_filename(nested)
+            assert "../" not in result
+            assert "..\\" not in result
+        assert manager.sanitize_filename("..\\../report.txt") == "report.txt"
     
     def test_validate_ip_address(self):
         """Test IP address validation."""
@@ -744,6 +765,31 @@ class TestSecurityUtilities:
         xss_attempt = "<script>alert('xss')</script>"
         assert manager.is_suspicious_request(xss_attempt) is True
     
+    def test_is_suspicious_request_self_reference(self):
+        """Test a self-referencing request is scanned once and terminates."""
+        from app.utils.security import SecurityManager
+        
+        request_data = {"comment": "<iframe src=x>", "nested": []}
+        request_data["self"] = request_data
+        request_data["nested"].append(request_data["nested"])
+        
+        analysis = SecurityManager.is_suspicious_request(request_data)
+        assert analysis["risk_score"] == 5
+        assert analysis["issues"] == ["Potential XSS attack detected"]
+    
+    def test_audit_loggers_share_one_listener(self):
+        """Test each AuditLogger reuses the process-wide queue and listener."""
+        import logging
+        from logging.handlers import QueueHandler
+        from app.utils.security import AuditLogger
+        
+        first = AuditLogger()
+        second = AuditLogger()
+        
+        assert first._listener is second._listener
+        handlers = logging.getLogger("security_audit").handlers
+        assert sum(isinstance(handler, QueueHandler) for handler in handlers) == 1
+    
     def test_generate_secure_token(self):
         """Test secure token generation."""
         from app.utils.security import SecurityManager
@@ -864,6 +910,24 @@ class TestValidationUtilities:
         
         result = validate_file_upload(invalid_file)
         assert result is False
+    
+    def test_validate_batch(self):
+        """Test validating many payloads against one validator."""
+        from pydantic import ValidationError
+        from app.utils.validators import DiagnosticRequestValidator, validate_batch
+        
+        payloads = [
+            {"symptoms": "  persistent low mood for weeks  "},
+            {"symptoms": "difficulty sleeping", "patient_context": "adult"}
+        ]
+        
+        result = validate_batch(DiagnosticRequestValidator, payloads)
+        assert [r.symptoms for r in result] == [
+            "persistent low mood for weeks", "difficulty sleeping"
+        ]
+        
+        with pytest.raises(ValidationError):
+            validate_batch(DiagnosticRequestValidator, [{"symptoms": "short"}])
 
 
 @pytest.mark.unit
@@ -929,4 +993,38 @@ class TestRateLimiter:
         
         # Cleanup should remove old entries
         limiter._cleanup_old_entries("user123")
-        assert len(limiter.requests.get("user123", [])) == 0
\ No newline at end of file
+        assert len(limiter.requests.get("user123", [])) == 0
+    
+    def test_rate_limiter_cleanup_skips_removed_clients(self):
+        """Test cleanup tolerates clients removed by a concurrent cleanup."""
+        from app.utils.security import RateLimiter
+        
+        class StaleKeys(dict):
+            """Lists a client another cleanup removed after the snapshot"""
+            def keys(self):
+                return ["removed", *super().keys()]
+        
+        limiter = RateLimiter()
+        limiter.requests = StaleKeys(user1=deque())
+        
+        limiter._cleanup_old_entries()
+        assert "user1" not in limiter.requests
+    
+    def test_rate_limiter_single_cleanup(self):
+        """Test only one thread runs the periodic cleanup at a time."""
+        from app.utils.security import RateLimiter
+        
+        limiter = RateLimiter()
+        limiter.last_cleanup -= limiter.cleanup_interval + 1
+        stale_cleanup = limiter.last_cleanup
+        
+        with patch.object(limiter, "_cleanup_old_entries") as cleanup:
+            # Cleanup in progress elsewhere: the request is answered without it
+            with limiter._cleanup_lock:
+                assert limiter.is_allowed("user1") is True
+            cleanup.assert_not_called()
+            assert limiter.last_cleanup == stale_cleanup
+            
+            assert limiter.is_allowed("user1") is True
+            cleanup.assert_called_once()
+            assert limiter.last_cleanup > stale_cleanup